@@ -0,0 +1,290 @@
+"""Benchmark suite of :mod:`fluiddyn.util.serieofarrays` on synthetic data
+
+Synthetic directories of small ``.npy`` files (with 1, 2 or 3 indices in
+their names) and a stacked HDF5 container (used as a movie-like container,
+i.e. many arrays in one file) are created in a temporary directory. For
+each case, the script measures:
+
+- the construction of the serie (from the directory and from a file, with
+  and without index file),
+- ``len(serie)``,
+- the random access to arrays (``get_array_from_index``),
+- the throughput of ``iter_arrays``,
+- the construction and the iteration of :class:`SeriesOfArrays` (pairs and
+  windows of 5 arrays).
+
+Each measure is the minimum over ``--repeat`` runs. The results are printed
+and saved in a JSON file (``--output``) to be compared over time.
+
+Usage::
+
+  python bench/bench_serieofarrays.py --nb-files 1000 10000 --output bench.json
+
+For large numbers of files (up to 10**6), ``--max-nb-arrays-read`` limits the
+number of arrays read in the reading measures.
+
+"""
+
+import argparse
+import io
+import json
+import platform
+import tempfile
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+
+import h5py
+import numpy as np
+
+import fluiddyn
+from fluiddyn.util.serieofarrays import (
+    SerieOfArraysFromFiles,
+    SerieOfArraysFromHDF5,
+    SeriesOfArrays,
+)
+
+shape_array = (8, 8)
+
+
+def _npy_bytes():
+    buffer = io.BytesIO()
+    np.save(buffer, np.ones(shape_array, dtype=np.uint8))
+    return buffer.getvalue()
+
+
+def compute_names(nb_files, nb_indices):
+    """Names of the files for a number of indices in the names"""
+    if nb_indices == 1:
+        return [f"im{index:07d}.npy" for index in range(nb_files)]
+    if nb_indices == 2:
+        # pairs of images (as in PIV)
+        return [
+            f"im{index:07d}{letter}.npy"
+            for index in range(nb_files // 2)
+            for letter in "ab"
+        ]
+    if nb_indices == 3:
+        nb_cameras = 4
+        nb_times = max(nb_files // (2 * nb_cameras), 1)
+        return [
+            f"im{camera}_{index:07d}_{frame}.npy"
+            for camera in range(nb_cameras)
+            for index in range(nb_times)
+            for frame in range(2)
+        ]
+    raise ValueError(f"nb_indices = {nb_indices} not in (1, 2, 3)")
+
+
+def create_directory(path_dir, nb_files, nb_indices):
+    path_dir.mkdir()
+    content = _npy_bytes()
+    names = compute_names(nb_files, nb_indices)
+    for name in names:
+        (path_dir / name).write_bytes(content)
+    return names
+
+
+def create_hdf5(path, nb_arrays):
+    with h5py.File(path, "w") as file:
+        dataset = file.create_dataset(
+            "images",
+            (nb_arrays,) + shape_array,
+            dtype=np.uint8,
+            chunks=(min(nb_arrays, 256),) + shape_array,
+        )
+        dataset[...] = 1
+
+
+def measure(func, repeat):
+    """Minimum duration over ``repeat`` runs and result of the last run"""
+    durations = []
+    for _ in range(repeat):
+        t_start = perf_counter()
+        result = func()
+        durations.append(perf_counter() - t_start)
+    return min(durations), result
+
+
+class Recorder:
+    def __init__(self):
+        self.results = []
+
+    def add(self, case, nb_files, measure, value, unit):
+        self.results.append(
+            dict(
+                case=case,
+                nb_files=nb_files,
+                measure=measure,
+                value=value,
+                unit=unit,
+            )
+        )
+        print(f"{case:>10} {nb_files:>9} {measure:<32} {value:12.4g} {unit}")
+
+
+def bench_serie(recorder, case, nb_files, create_serie, args):
+    """Measures common to all kinds of series"""
+    duration, serie = measure(create_serie, args.repeat)
+    recorder.add(case, nb_files, "construction", duration, "s")
+
+    duration, nb_arrays = measure(lambda: len(serie), args.repeat)
+    recorder.add(case, nb_files, "len", duration, "s")
+
+    rng = np.random.default_rng(0)
+    indices = rng.integers(0, nb_arrays, args.nb_random_accesses)
+    duration, _ = measure(
+        lambda: [serie.get_array_from_index(int(index)) for index in indices],
+        args.repeat,
+    )
+    recorder.add(
+        case, nb_files, "random access", duration / len(indices), "s/array"
+    )
+
+    nb_arrays_read = min(nb_arrays, args.max_nb_arrays_read)
+    for prefetch in (0, 4):
+        duration, _ = measure(
+            lambda: sum(
+                1
+                for _ in islice(
+                    serie.iter_arrays(prefetch=prefetch, nb_workers=2),
+                    nb_arrays_read,
+                )
+            ),
+            args.repeat,
+        )
+        recorder.add(
+            case,
+            nb_files,
+            f"iter_arrays (prefetch={prefetch})",
+            nb_arrays_read / duration,
+            "arrays/s",
+        )
+    return serie
+
+
+def bench_series(recorder, case, nb_files, serie, slicing, args):
+    duration, series = measure(
+        lambda: SeriesOfArrays(serie, slicing), args.repeat
+    )
+    recorder.add(case, nb_files, f"SeriesOfArrays({slicing!r})", duration, "s")
+
+    nb_series = min(len(series), args.max_nb_arrays_read)
+    for method in ("iter_arrays", "iter_arrays_read_once"):
+        iterator_factory = getattr(series, method)
+        duration, _ = measure(
+            lambda: sum(1 for _ in islice(iterator_factory(), nb_series)),
+            args.repeat,
+        )
+        recorder.add(
+            case,
+            nb_files,
+            f"{method} ({slicing!r})",
+            nb_series / duration,
+            "series/s",
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nb-files", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument(
+        "--nb-indices", type=int, nargs="+", default=[1, 2, 3], choices=[1, 2, 3]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--nb-random-accesses", type=int, default=200)
+    parser.add_argument("--max-nb-arrays-read", type=int, default=10_000)
+    parser.add_argument("--no-hdf5", action="store_true")
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument(
+        "--tmp-dir",
+        type=str,
+        default=None,
+        help="Directory where the synthetic data is created",
+    )
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        for nb_files in args.nb_files:
+            for nb_indices in args.nb_indices:
+                case = f"{nb_indices}index" + ("es" if nb_indices > 1 else "")
+                path_dir = tmp_dir / f"{case}_{nb_files}"
+                names = create_directory(path_dir, nb_files, nb_indices)
+                nb_real = len(names)
+
+                serie = bench_serie(
+                    recorder,
+                    case,
+                    nb_real,
+                    lambda: SerieOfArraysFromFiles(path_dir),
+                    args,
+                )
+                assert serie.nb_indices == nb_indices, (
+                    serie.nb_indices,
+                    nb_indices,
+                )
+                duration, _ = measure(
+                    lambda: SerieOfArraysFromFiles(path_dir / names[0]),
+                    args.repeat,
+                )
+                recorder.add(
+                    case, nb_real, "construction (from a file)", duration, "s"
+                )
+                # first construction writes the index file
+                SerieOfArraysFromFiles(path_dir / names[0], index_file=True)
+                duration, serie = measure(
+                    lambda: SerieOfArraysFromFiles(
+                        path_dir / names[0], index_file=True
+                    ),
+                    args.repeat,
+                )
+                recorder.add(
+                    case, nb_real, "construction (index file)", duration, "s"
+                )
+
+                if nb_indices == 1:
+                    for slicing in ("pairs", "i:i+5"):
+                        bench_series(
+                            recorder, case, nb_real, serie, slicing, args
+                        )
+                elif nb_indices == 2:
+                    bench_series(recorder, case, nb_real, serie, "pairs", args)
+                else:
+                    # the 2 frames of one camera for each time
+                    bench_series(recorder, case, nb_real, serie, "0, i, :", args)
+
+            if not args.no_hdf5:
+                path_h5 = tmp_dir / f"stack_{nb_files}.h5"
+                create_hdf5(path_h5, nb_files)
+                serie = bench_serie(
+                    recorder,
+                    "hdf5",
+                    nb_files,
+                    lambda: SerieOfArraysFromHDF5(path_h5),
+                    args,
+                )
+                bench_series(recorder, "hdf5", nb_files, serie, "pairs", args)
+
+    if args.output is not None:
+        metadata = dict(
+            date=datetime.now(timezone.utc).isoformat(),
+            fluiddyn=fluiddyn.__version__,
+            numpy=np.__version__,
+            h5py=h5py.__version__,
+            python=platform.python_version(),
+            platform=platform.platform(),
+            shape_array=shape_array,
+            repeat=args.repeat,
+        )
+        with open(args.output, "w") as file:
+            json.dump(
+                dict(metadata=metadata, results=recorder.results), file, indent=1
+            )
+        print(f"results saved in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
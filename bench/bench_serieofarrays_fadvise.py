@@ -0,0 +1,138 @@
+"""Benchmark of the OS hints (posix_fadvise) used when scanning a serie of files
+
+A synthetic directory of PNG images (random data, i.e. incompressible) is
+created and scanned once with different settings of
+:func:`fluiddyn.util.serieofarrays.SerieOfArraysFromFiles.set_io_hints`.
+Before each scan, the files are evicted from the page cache (with
+``POSIX_FADV_DONTNEED``) to simulate a cold cache. After each scan, the
+fraction of the data of the serie remaining in the page cache is measured
+(with ``mincore``, only on Linux).
+
+Usage::
+
+  python bench/bench_serieofarrays_fadvise.py --nb-files 200 --size 1024
+
+Use ``--path-dir`` to create the files on a particular disk (for example a
+spinning disk, for which the readahead is the most useful).
+
+"""
+
+import argparse
+import ctypes
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+from PIL import Image
+
+from fluiddyn.util.serieofarrays import SerieOfArraysFromFiles, _fadvise
+
+
+def create_files(path_dir, nb_files, size):
+    rng = np.random.default_rng(0)
+    for index in range(nb_files):
+        array = rng.integers(0, 256, (size, size), dtype=np.uint8)
+        Image.fromarray(array).save(path_dir / f"im{index:05d}.png")
+
+
+def fraction_in_page_cache(paths):
+    """Fraction of the data of the files in the page cache (Linux only)"""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_long,
+        ]
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.mincore.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_char_p,
+        ]
+    except (OSError, AttributeError):
+        return float("nan")
+
+    nb_pages = nb_pages_cached = 0
+    for path in paths:
+        size = os.path.getsize(path)
+        if size == 0:
+            continue
+        nb_pages_file = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            address = libc.mmap(
+                None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0
+            )
+            if address in (None, ctypes.c_void_p(-1).value):
+                return float("nan")
+            vector = ctypes.create_string_buffer(nb_pages_file)
+            try:
+                if libc.mincore(address, size, vector) != 0:
+                    return float("nan")
+            finally:
+                libc.munmap(address, size)
+        finally:
+            os.close(fd)
+        nb_pages += nb_pages_file
+        nb_pages_cached += sum(byte & 1 for byte in vector.raw)
+    return nb_pages_cached / nb_pages
+
+
+def bench(path_dir, nb_files_ahead, drop_after_read, prefetch):
+    serie = SerieOfArraysFromFiles(path_dir)
+    serie.set_io_hints(nb_files_ahead, drop_after_read)
+    paths = list(serie.get_path_files())
+    for path in paths:
+        _fadvise(path, "DONTNEED")
+
+    t_start = perf_counter()
+    for array in serie.iter_arrays(prefetch=prefetch, nb_workers=2):
+        array.sum()
+    duration = perf_counter() - t_start
+    return duration, fraction_in_page_cache(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nb-files", type=int, default=200)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--path-dir", type=str, default=None)
+    args = parser.parse_args()
+
+    if not hasattr(os, "posix_fadvise"):
+        print("os.posix_fadvise is not available on this platform.")
+        return
+
+    with tempfile.TemporaryDirectory(dir=args.path_dir) as tmp_dir:
+        path_dir = Path(tmp_dir)
+        create_files(path_dir, args.nb_files, args.size)
+        print(
+            f"{args.nb_files} files of {args.size}x{args.size} pixels in {path_dir}"
+        )
+        print("nb_files_ahead drop_after_read prefetch  time (s)  cached")
+        for nb_files_ahead, drop_after_read, prefetch in [
+            (0, False, 0),
+            (8, False, 0),
+            (0, True, 0),
+            (8, True, 0),
+            (8, True, 2),
+        ]:
+            duration, fraction = bench(
+                path_dir, nb_files_ahead, drop_after_read, prefetch
+            )
+            print(
+                f"{nb_files_ahead:14d} {str(drop_after_read):>15} {prefetch:8d}"
+                f"  {duration:8.3f}  {fraction:6.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Micro-benchmark of the parsing and formatting of names of series of arrays
+
+Compares the per-name methods of
+:class:`fluiddyn.util.serieofarrays.SerieOfArraysFromFiles`
+(``compute_indices_from_name`` and ``compute_name_from_indices``) with their
+batch versions (``compute_indices_from_names`` and
+``compute_names_from_indices``).
+
+Usage::
+
+  python bench/bench_serieofarrays_names.py --nb-names 1000000
+
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from fluiddyn.util.serieofarrays import SerieOfArraysFromFiles
+
+
+def bench(func, *args):
+    t_start = perf_counter()
+    result = func(*args)
+    return perf_counter() - t_start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--nb-names", type=int, default=1_000_000)
+    args = parser.parse_args()
+    nb_names = args.nb_names
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 2 indices: time (digits) and frame (letter)
+        for name in ("im0000000a.png", "im0000000b.png"):
+            (Path(tmp_dir) / name).touch()
+        serie = SerieOfArraysFromFiles(tmp_dir)
+
+    indices = np.empty((nb_names, 2), dtype=np.int64)
+    indices[:, 0] = np.arange(nb_names) // 2
+    indices[:, 1] = np.arange(nb_names) % 2
+    tuples_indices = [tuple(row) for row in indices.tolist()]
+
+    print(f"{nb_names} names of the form {serie.compute_name_from_indices(0, 1)}")
+
+    duration, names = bench(
+        lambda: [serie.compute_name_from_indices(*i) for i in tuples_indices]
+    )
+    print(f"compute_name_from_indices (loop): {duration:.3f} s")
+    duration, names_batch = bench(serie.compute_names_from_indices, indices)
+    print(f"compute_names_from_indices:       {duration:.3f} s")
+    assert names == names_batch
+
+    duration, indices_loop = bench(
+        lambda: [serie.compute_indices_from_name(name) for name in names]
+    )
+    print(f"compute_indices_from_name (loop): {duration:.3f} s")
+    duration, indices_batch = bench(serie.compute_indices_from_names, names)
+    print(f"compute_indices_from_names:       {duration:.3f} s")
+    assert indices_loop == indices_batch.tolist() == indices.tolist()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,16 @@ Read and save image files
 
 """
 
+import importlib.util
+import io
 import os
+import threading
+import warnings
+from collections import OrderedDict
+from collections.abc import Mapping
+from time import perf_counter
 
+import h5py
 import numpy as np
 
 from .hdf5 import H5File
@@ -23,21 +31,19 @@ use_opencv = not bool(error_import_cv2)
 if use_opencv:
     _imread_opencv = cv2.imread
     IMREAD_ANYDEPTH = cv2.IMREAD_ANYDEPTH
-else:
+
+try:
     try:
-        try:
-            from imageio.v2 import imread as _imread
-        except ImportError:
-            from imageio import imread as _imread
+        from imageio.v2 import imread as _imread_imageio
     except ImportError:
-        # we use imread from matplotlib but there could be a problem with one
-        # unittest.  If it is really a problem, install imageio.
-        from matplotlib.pyplot import imread as _imread
+        from imageio import imread as _imread_imageio
+except ImportError:
+    _imread_imageio = None
 
 try:
     from skimage.io import imread as _imread_ski
 except ImportError:
-    pass
+    _imread_ski = None
 
 try:
     import pims
@@ -45,34 +51,684 @@ except ImportError:
     pass
 
 
-__all__ = ["imread", "imsave", "imread_h5", "imsave_h5", "extensions_movies"]
+__all__ = [
+    "imread",
+    "imsave",
+    "imread_h5",
+    "imsave_h5",
+    "imappend_h5",
+    "imread_stack_h5",
+    "ImageH5File",
+    "LazyImagesH5",
+    "extensions_movies",
+    "MovieReaderPool",
+    "movie_readers",
+    "readers_by_extension",
+    "register_reader",
+    "get_imread_backend",
+    "load_imread_backends",
+    "save_imread_backends",
+    "calibrate_imread_backends",
+]
 
 
 extensions_movies = ["cine", "im7"]
 
 
-def imread(path, *args, **kwargs):
-    """Wrapper for OpenCV/SciPy imread functions."""
+class MovieReaderPool:
+    """Bounded pool of open readers of movie files (cine, im7, ...)
+
+    Reading a frame of a movie file with :func:`imread` (with a path like
+    ``"movie.cine[12]"``) uses the reader of the file kept open in the pool,
+    so that the header of the file is parsed only once. The least recently
+    used readers are closed when there are more than ``max_nb_readers`` open
+    readers. The readers inherited by a process created with ``fork`` are
+    not used (new readers are opened in the child process).
+
+    Parameters
+    ----------
+
+    max_nb_readers : int
+
+      Maximum number of open readers.
+
+    open_reader : callable, optional
+
+      Function used to open a reader (default ``pims.open``).
+
+    """
+
+    def __init__(self, max_nb_readers=8, open_reader=None):
+        self.max_nb_readers = max_nb_readers
+        self._open_reader = open_reader
+        self._readers = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __len__(self):
+        return len(self._readers)
+
+    def _get_reader(self, path):
+        """Get an open reader (a :class:`_PooledReader`)
+
+        The reader can be closed by another thread (if it is evicted from the
+        pool) before it is used, so the attribute ``closed`` has to be checked
+        with the lock of the reader.
+
+        """
+        if os.getpid() != self._pid:
+            # readers inherited from the parent process
+            self._readers = OrderedDict()
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+        path = os.path.abspath(path)
+        with self._lock:
+            try:
+                pooled = self._readers[path]
+            except KeyError:
+                pass
+            else:
+                self._readers.move_to_end(path)
+                return pooled
+
+        # opened without the lock of the pool so that different files can be
+        # opened at the same time
+        open_reader = self._open_reader or pims.open
+        pooled_new = _PooledReader(open_reader(path))
+
+        to_be_closed = []
+        with self._lock:
+            try:
+                pooled = self._readers[path]
+            except KeyError:
+                pooled = self._readers[path] = pooled_new
+                while len(self._readers) > self.max_nb_readers:
+                    to_be_closed.append(self._readers.popitem(last=False)[1])
+            else:
+                # opened at the same time by another thread
+                self._readers.move_to_end(path)
+                to_be_closed.append(pooled_new)
+        for pooled_to_be_closed in to_be_closed:
+            pooled_to_be_closed.close()
+        return pooled
+
+    def _call_reader(self, path, method_name, *args):
+        while True:
+            pooled = self._get_reader(path)
+            with pooled.lock:
+                if not pooled.closed:
+                    return getattr(pooled.reader, method_name)(*args)
+            # the reader has been evicted by another thread: a new reader is
+            # opened
+
+    def get_frame(self, path, index):
+        """Read a frame of a movie file."""
+        return self._call_reader(path, "get_frame", index)
+
+    def get_nb_frames(self, path):
+        """Get the number of frames of a movie file."""
+        return self._call_reader(path, "len")
+
+    def close(self):
+        """Close all readers."""
+        with self._lock:
+            pooled_readers = list(self._readers.values())
+            self._readers.clear()
+        for pooled in pooled_readers:
+            pooled.close()
+
+
+class _PooledReader:
+    """Reader of a :class:`MovieReaderPool` with its lock (readers are not
+    thread safe)"""
+
+    __slots__ = ("reader", "lock", "closed")
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def close(self):
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.reader.close()
+
+
+movie_readers = MovieReaderPool()
+
+
+readers_by_extension = {}
+
+
+def register_reader(name, function, extensions):
+    """Register a function reading images (a backend of :func:`imread`)
+
+    Parameters
+    ----------
+
+    name : str
+
+      Name of the backend (used for the argument ``backend`` of
+      :func:`imread` and in the user configuration).
+
+    function : callable
+
+      Function taking the path of the file and returning an array.
+
+    extensions : iterable of str
+
+      Extensions (for example ``".png"``) of the files read by the function.
+
+    """
+    for extension in extensions:
+        readers_by_extension.setdefault(extension.lower(), {})[name] = function
+
+
+def _imread_with_opencv(path, *args, **kwargs):
+    im = _imread_opencv(path, IMREAD_ANYDEPTH)
+    if im is None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return im
+
+
+def _imread_with_pillow(path, *args, **kwargs):
+    with Image.open(path) as im:
+        return np.array(im)
+
+
+def _imread_with_matplotlib(path, *args, **kwargs):
+    # there could be a problem with one unittest. If it is really a problem,
+    # install imageio.
+    from matplotlib.pyplot import imread
+
+    return imread(path, *args, **kwargs)
+
+
+def _imread_with_tifffile(path, *args, **kwargs):
+    import tifffile
+
+    return tifffile.imread(path, *args, **kwargs)
+
+
+def _imread_with_numpy(path, *args, **kwargs):
+    return np.load(path)
+
+
+_extensions_images = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+_extensions_tiff = (".tif", ".tiff")
+
+if use_opencv:
+    register_reader("opencv", _imread_with_opencv, _extensions_images)
+if _imread_ski is not None:
+    register_reader("skimage", _imread_ski, _extensions_images)
+if _imread_imageio is not None:
+    register_reader("imageio", _imread_imageio, _extensions_images)
+if "Image" in globals():
+    register_reader("pillow", _imread_with_pillow, _extensions_images)
+if importlib.util.find_spec("tifffile") is not None:
+    register_reader("tifffile", _imread_with_tifffile, _extensions_tiff)
+if importlib.util.find_spec("matplotlib") is not None:
+    register_reader("matplotlib", _imread_with_matplotlib, (".png",))
+register_reader("numpy", _imread_with_numpy, (".npy",))
+
+# readers of the files with an extension not registered (.gif, .pgm, ...,
+# or no extension), in order of preference
+_readers_other_extensions = {
+    name: readers_by_extension[".png"][name]
+    for name in ("opencv", "imageio", "pillow", "matplotlib")
+    if name in readers_by_extension.get(".png", {})
+}
+
+
+def _get_default_backend(extension):
+    """Backend used without calibration (choice based on availability)
+
+    As before the registry of backends, the PNG files are read with
+    matplotlib when opencv and imageio are not installed. The files with an
+    unregistered extension are read with the first available reader of
+    ``_readers_other_extensions`` (opencv, imageio, pillow, matplotlib).
+
+    """
+    try:
+        readers = readers_by_extension[extension]
+    except KeyError:
+        readers = _readers_other_extensions
+        preferred = ()
+    else:
+        if extension in _extensions_tiff:
+            preferred = ("skimage", "tifffile", "imageio", "pillow")
+        else:
+            preferred = ("numpy", "opencv", "imageio", "matplotlib", "pillow")
+    for name in preferred:
+        if name in readers:
+            return name
+    if readers:
+        return next(iter(readers))
+    return None
+
+
+_backends_user = None
+
+
+def load_imread_backends():
+    """Load the backends of :func:`imread` chosen in the user configuration
+
+    The backends are given in the file ``~/.fluiddyn/config.py`` by a
+    dictionary ``imread_backends`` (extension to name of backend), for
+    example written by :func:`save_imread_backends`.
+
+    """
+    global _backends_user
+    from fluiddyn.util.userconfig import load_user_conf_files
+
+    _backends_user = {
+        extension.lower(): name
+        for extension, name in load_user_conf_files()
+        .get("imread_backends", {})
+        .items()
+    }
+    return _backends_user
+
+
+def get_imread_backend(path):
+    """Get the name of the backend used by :func:`imread` for a file
+
+    The backend chosen in the user configuration is used if it is available
+    (see :func:`load_imread_backends`).
+
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+    if _backends_user is None:
+        load_imread_backends()
+    name = _backends_user.get(extension)
+    if name in readers_by_extension.get(extension, _readers_other_extensions):
+        return name
+    return _get_default_backend(extension)
+
+
+def _get_reader(path, backend):
+    extension = os.path.splitext(path)[1].lower()
+    if backend is None:
+        backend = get_imread_backend(path)
+        if backend is None:
+            raise ValueError(f"No backend to read files {extension}")
+    readers = readers_by_extension.get(extension, _readers_other_extensions)
+    try:
+        return readers[backend]
+    except KeyError:
+        pass
+    # backend not registered for this extension
+    for readers in readers_by_extension.values():
+        if backend in readers:
+            return readers[backend]
+    raise ValueError(f"Unknown backend {backend!r}")
+
+
+def _read_roi_partial(path, roi):
+    """Read a region of an image without decoding the whole file
+
+    Only for formats stored without compression (``.npy`` files and
+    contiguous uncompressed TIFF files, which are memory-mapped). Returns None
+    if it is not possible.
+
+    """
+    if path.endswith(".npy"):
+        mmap = np.load(path, mmap_mode="r")
+    elif path.lower().endswith((".tiff", ".tif")):
+        try:
+            import tifffile
+
+            mmap = tifffile.memmap(path, mode="r")
+        except (ImportError, ValueError):
+            return None
+    else:
+        return None
+    return np.array(mmap[roi])
+
+
+def _read_into(path, out, roi=None):
+    """Decode an image directly into ``out`` (return False if not possible)
+
+    Supported for ``.npy`` files and TIFF files (with tifffile), when the
+    dtype of ``out`` is the dtype of the image.
+
+    """
+    if roi is not None:
+        if not path.endswith(".npy") and not path.lower().endswith(
+            (".tiff", ".tif")
+        ):
+            return False
+        if path.endswith(".npy"):
+            mmap = np.load(path, mmap_mode="r")
+        else:
+            try:
+                import tifffile
+
+                mmap = tifffile.memmap(path, mode="r")
+            except (ImportError, ValueError):
+                return False
+        region = mmap[roi]
+        if region.shape != out.shape or region.dtype != out.dtype:
+            return False
+        np.copyto(out, region)
+        return True
+
+    if path.endswith(".npy"):
+        if not out.flags.c_contiguous:
+            return False
+        with open(path, "rb") as file:
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(file)
+            elif version == (2, 0):
+                header = np.lib.format.read_array_header_2_0(file)
+            else:
+                return False
+            shape, fortran_order, dtype = header
+            if fortran_order or shape != out.shape or dtype != out.dtype:
+                return False
+            if dtype.hasobject:
+                return False
+            return file.readinto(out) == out.nbytes
+
+    if path.lower().endswith((".tiff", ".tif")):
+        try:
+            import tifffile
+
+            with tifffile.TiffFile(path) as tif:
+                series = tif.series[0]
+                if series.shape != out.shape or series.dtype != out.dtype:
+                    return False
+                series.asarray(out=out)
+        except (ImportError, ValueError):
+            return False
+        return True
+
+    return False
+
+
+def imread(path, *args, roi=None, out=None, dtype=None, backend=None, **kwargs):
+    """Wrapper for OpenCV/SciPy imread functions.
+
+    Parameters
+    ----------
+
+    path : str
+
+      Path of the image (``"movie.cine[12]"`` for an image of a movie file).
+
+    roi : tuple of slices, optional
+
+      Region of interest (for example ``(slice(100, 200), slice(None, None,
+      2))``). For uncompressed formats (``.npy`` and uncompressed TIFF
+      files), only the region is read. Otherwise, the image is read and the
+      region is copied.
+
+    out : numpy.ndarray, optional
+
+      Array in which the image is stored (and returned), for example a slot
+      of a preallocated buffer. For ``.npy`` and TIFF files with the same
+      dtype, the image is decoded directly into ``out``. Otherwise, the
+      image is decoded and copied once into ``out`` (with a conversion to
+      ``out.dtype``).
+
+    dtype : numpy.dtype, optional
+
+      Dtype of the result (has to be equal to ``out.dtype`` if ``out`` is
+      given).
+
+    backend : str, optional
+
+      Name of the reader used to decode the file (for example ``"opencv"``,
+      ``"skimage"``, ``"imageio"``, ``"pillow"`` or ``"tifffile"``, see
+      :data:`readers_by_extension`). By default, the backend chosen in the
+      user configuration (see the command ``fluidimread-calibrate``) or a
+      backend chosen from the available packages.
+
+    """
     path = str(path)
+    if out is not None or dtype is not None:
+        if out is None:
+            return imread(path, *args, roi=roi, backend=backend, **kwargs).astype(
+                dtype, copy=False
+            )
+        if dtype is not None and np.dtype(dtype) != out.dtype:
+            raise ValueError(f"dtype {dtype} != out.dtype {out.dtype}")
+        if (
+            backend is None
+            and not args
+            and not kwargs
+            and _read_into(path, out, roi)
+        ):
+            return out
+        image = imread(path, *args, roi=roi, backend=backend, **kwargs)
+        if image.shape != out.shape:
+            raise ValueError(f"out.shape = {out.shape} != {image.shape}")
+        np.copyto(out, image, casting="unsafe")
+        return out
+
+    if roi is not None:
+        image = None
+        if backend is None:
+            image = _read_roi_partial(path, roi)
+        if image is None:
+            image = imread(path, *args, backend=backend, **kwargs)[roi].copy()
+        return image
+
     if path.endswith("]"):
-        path, internal_index = path.split("[")
+        path, internal_index = path.rsplit("[", 1)
         internal_index = int(internal_index[:-1])
         for ext in extensions_movies:
             if path.endswith("." + ext):
-                with pims.open(path) as images:
-                    return images.get_frame(internal_index)
+                return movie_readers.get_frame(path, internal_index)
 
-    if path.lower().endswith((".tiff", ".tif")):
-        return _imread_ski(path, *args, **kwargs)
-
-    if use_opencv:
-        im = _imread_opencv(path, IMREAD_ANYDEPTH)
-        if im is None:
-            if not os.path.exists(path):
-                raise FileNotFoundError(f"No such file or directory: {path}")
-        return im
+    return _get_reader(path, backend)(path, *args, **kwargs)
+
+
+def calibrate_imread_backends(paths, nb_repeat=3):
+    """Time the available backends of :func:`imread` on sample files
+
+    The backends giving a result different from the default backend (for
+    example a float image for an integer PNG file) are not timed. The sample
+    files that the default backend fails to read are skipped (with a
+    warning).
+
+    Parameters
+    ----------
+
+    paths : iterable of str
+
+      Paths of sample files.
+
+    nb_repeat : int
+
+      Number of readings of each file by each backend (the minimum
+      duration is kept).
+
+    Returns
+    -------
+
+    durations : dict
+
+      For each extension, dictionary (name of the backend to the sum of the
+      durations for the sample files, in s). The backends failing to read a
+      sample file or inconsistent with the default backend are not included.
+
+    """
+    durations = {}
+    failed = {}
+    for path in paths:
+        path = str(path)
+        extension = os.path.splitext(path)[1].lower()
+        readers = readers_by_extension.get(extension)
+        if not readers:
+            continue
+        name_default = _get_default_backend(extension)
+        try:
+            reference = np.asarray(readers[name_default](path))
+        except Exception as error:
+            warnings.warn(
+                f"Sample file {path} not used (error with the default backend "
+                f"{name_default}: {error!r})"
+            )
+            continue
+        durations_ext = durations.setdefault(extension, {})
+        failed_ext = failed.setdefault(extension, set())
+        for name, function in readers.items():
+            if name in failed_ext:
+                continue
+            try:
+                image = function(path)
+            except Exception:
+                failed_ext.add(name)
+                continue
+            image = np.asarray(image)
+            if image.dtype != reference.dtype or not np.array_equal(
+                image, reference
+            ):
+                failed_ext.add(name)
+                continue
+            times = []
+            for _ in range(nb_repeat):
+                t_start = perf_counter()
+                function(path)
+                times.append(perf_counter() - t_start)
+            durations_ext[name] = durations_ext.get(name, 0.0) + min(times)
+
+    return {
+        extension: {
+            name: duration
+            for name, duration in durations_ext.items()
+            if name not in failed[extension]
+        }
+        for extension, durations_ext in durations.items()
+    }
+
+
+_begin_config_backends = "# imread backends (written by fluidimread-calibrate)"
+_end_config_backends = "# end imread backends"
+
+
+def save_imread_backends(backends, path_config=None):
+    """Save the backends of :func:`imread` in the user configuration
+
+    A dictionary ``imread_backends`` is written in the file
+    ``~/.fluiddyn/config.py`` (replacing the one written previously by this
+    function). The backends are used by :func:`imread` when the argument
+    ``backend`` is not given.
+
+    Parameters
+    ----------
+
+    backends : dict
+
+      Extension to name of the backend (for example ``{".png": "opencv"}``).
+
+    path_config : str, optional
+
+      Path of the configuration file (default ``~/.fluiddyn/config.py``).
+
+    """
+    global _backends_user
+    if path_config is None:
+        path_config = os.path.join(
+            os.path.expanduser("~"), ".fluiddyn", "config.py"
+        )
+    lines = []
+    if os.path.exists(path_config):
+        with open(path_config) as file:
+            in_block = False
+            for line in file:
+                if line.rstrip() == _begin_config_backends:
+                    in_block = True
+                elif in_block and line.rstrip() == _end_config_backends:
+                    in_block = False
+                elif not in_block:
+                    lines.append(line)
     else:
-        return _imread(path, *args, **kwargs)
+        os.makedirs(os.path.dirname(path_config), exist_ok=True)
+
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    lines.append(_begin_config_backends + "\n")
+    lines.append("imread_backends = {\n")
+    for extension, name in sorted(backends.items()):
+        lines.append(f"    {extension!r}: {name!r},\n")
+    lines.append("}\n")
+    lines.append(_end_config_backends + "\n")
+    with open(path_config, "w") as file:
+        file.writelines(lines)
+    _backends_user = None
+
+
+def _create_sample_files(path_dir, size):
+    """Create sample files (PNG and TIFF files with different dtypes)"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for dtype in (np.uint8, np.uint16):
+        array = rng.integers(0, np.iinfo(dtype).max, (size, size), dtype=dtype)
+        path = os.path.join(path_dir, f"sample_{np.dtype(dtype).name}.png")
+        Image.fromarray(array).save(path)
+        paths.append(path)
+    for dtype in (np.uint8, np.uint16, np.float32):
+        array = (1000 * rng.random((size, size))).astype(dtype)
+        path = os.path.join(path_dir, f"sample_{np.dtype(dtype).name}.tif")
+        Image.fromarray(array).save(path)
+        paths.append(path)
+    return paths
+
+
+def main_calibrate():
+    """Time the backends of imread and save the fastest ones"""
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(
+        prog="fluidimread-calibrate",
+        description=(
+            "Time the available backends of fluiddyn.io.image.imread on "
+            "sample files and save the fastest backends in the user "
+            "configuration (~/.fluiddyn/config.py)."
+        ),
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Sample files (by default, PNG and TIFF files are created)",
+    )
+    parser.add_argument("--nb-repeat", type=int, default=5)
+    parser.add_argument(
+        "--size", type=int, default=1024, help="Size of the created files"
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="Do not save the results"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = args.paths or _create_sample_files(tmp_dir, args.size)
+        durations = calibrate_imread_backends(paths, args.nb_repeat)
+
+    backends = {}
+    for extension, durations_ext in sorted(durations.items()):
+        if not durations_ext:
+            continue
+        backends[extension] = min(durations_ext, key=durations_ext.get)
+        print(f"{extension}:")
+        for name, duration in sorted(durations_ext.items(), key=lambda t: t[1]):
+            print(f"  {name:<12} {duration * 1000:10.3f} ms")
+
+    for extension, equivalent in ((".tif", ".tiff"), (".jpg", ".jpeg")):
+        if extension in backends:
+            backends.setdefault(equivalent, backends[extension])
+
+    if not args.no_save:
+        save_imread_backends({**load_imread_backends(), **backends})
+        print("backends saved in the user configuration:", backends)
 
 
 def _image_from_array(array, as_int):
@@ -147,11 +803,16 @@ def imsave(path, array, format=None, as_int=False):
     im.close()
 
 
-def imread_h5(path):
-    """Read image(s) stored in a HDF5 file."""
+def imread_h5(path, lazy=False):
+    """Read image(s) stored in a HDF5 file.
+
+    With ``lazy=True``, a :class:`LazyImagesH5` mapping is returned and the
+    images are read on first access (the file is reopened for each read).
+
+    """
 
     with ImageH5File(path, "r") as f:
-        return f.load(group="images")
+        return f.load(group="images", lazy=lazy)
 
 
 def imsave_h5(
@@ -162,8 +823,34 @@ def imsave_h5(
     compression="gzip",
     as_int=False,
     splitext=True,
+    tolerance=None,
+    scaleoffset=False,
 ):
-    """Saves an image as a compressed HDF5 file."""
+    """Saves an image as a compressed HDF5 file.
+
+    Parameters
+    ----------
+
+    tolerance : float, optional
+
+      For float images, absolute tolerance of a lossy compression (see
+      :func:`ImageH5File.save_image`). The images are dequantised by
+      :func:`imread_h5`.
+
+    scaleoffset : bool, optional
+
+      If True, the scale-offset filter of HDF5 is used for the lossy
+      compression (instead of an explicit quantisation).
+
+    Returns
+    -------
+
+    report : dict
+
+      Compression ratio (``"compression_ratio"``) and maximum absolute error
+      (``"max_error"``).
+
+    """
 
     fname = os.path.basename(path)
     if splitext:
@@ -181,31 +868,243 @@ def imsave_h5(
         array = array.astype(dtype)
 
     with ImageH5File(h5path, "w") as f:
-        f.save_dict(
-            "images", {fname: array}, compression=compression, shuffle=True
+        report = f.save_image(
+            "images",
+            fname,
+            array,
+            compression=compression,
+            tolerance=tolerance,
+            scaleoffset=scaleoffset,
         )
         f.save_attrs(attrs)
         if params is not None:
             params._save_as_hdf5(hdf5_parent=f)
+    return report
+
+
+def _reduce_tolerance(array, tolerance):
+    """Tolerance of the quantisation taking into account the rounding error of
+    the conversion to the dtype of the array"""
+    if tolerance <= 0:
+        raise ValueError(f"tolerance = {tolerance} <= 0")
+    if np.isinf(array).any():
+        raise ValueError(
+            "Arrays with infinite values cannot be saved with a tolerance."
+        )
+    max_abs = np.nanmax(np.abs(array)) if array.size else 0.0
+    if np.isnan(max_abs):
+        max_abs = 0.0
+    tolerance_reduced = tolerance - max_abs * np.finfo(array.dtype).eps
+    if tolerance_reduced <= 0:
+        raise ValueError(
+            f"tolerance = {tolerance} too small for the dtype {array.dtype}"
+        )
+    return tolerance_reduced
+
+
+def _quantize(array, tolerance):
+    """Quantise a float array (absolute error smaller than ``tolerance``)
+
+    Returns the array of unsigned integers and the attributes needed to
+    dequantise it (with the CF conventions ``scale_factor``, ``add_offset``
+    and ``_FillValue`` for NaN).
+
+    """
+    scale = 2 * _reduce_tolerance(array, tolerance)
+    isnan = np.isnan(array)
+    if isnan.all():
+        offset = 0.0
+    else:
+        offset = float(np.nanmin(array))
+    quantized = np.round((array.astype(np.float64) - offset) / scale)
+    max_quantized = 0 if isnan.all() else np.nanmax(quantized)
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        # the maximum value is reserved for NaN
+        fill_value = np.iinfo(dtype).max
+        if max_quantized < fill_value:
+            break
+    else:
+        raise ValueError(f"tolerance = {tolerance} too small")
+    quantized[isnan] = fill_value
+    attrs = {
+        "scale_factor": scale,
+        "add_offset": offset,
+        "_FillValue": dtype(fill_value),
+        "dtype_dequantized": array.dtype.str,
+    }
+    return quantized.astype(dtype), attrs
+
+
+def _filter_scaleoffset(array, nb_digits):
+    """Array as read after the scale-offset filter of HDF5"""
+    buffer = io.BytesIO()
+    with h5py.File(buffer, "w") as file:
+        file.create_dataset("array", data=array, scaleoffset=nb_digits)
+    with h5py.File(buffer, "r") as file:
+        return file["array"][...]
+
+
+def _read_image_dataset(dset):
+    """Read a dataset of an image (dequantised if needed)"""
+    data = dset[...]
+    attrs = dset.attrs
+    if "dtype_dequantized" not in attrs:
+        # not quantised by _quantize (also for datasets with other
+        # attributes scale_factor, for example written by netCDF tools)
+        return data
+    dtype = np.dtype(attrs["dtype_dequantized"])
+    image = data * attrs["scale_factor"] + attrs["add_offset"]
+    image[data == attrs["_FillValue"]] = np.nan
+    return image.astype(dtype)
+
+
+def _read_frames(dset, frames):
+    """Read a selection of frames (along the first axis) of a dataset"""
+    if isinstance(frames, (int, np.integer)):
+        return dset[int(frames)]
+    if isinstance(frames, slice):
+        if frames.step is None or frames.step > 0:
+            return dset[frames]
+        frames = range(*frames.indices(dset.shape[0]))
+    indices = np.asarray(frames, dtype=np.intp)
+    # no modification in place of the selection given by the user
+    indices = np.where(indices < 0, indices + dset.shape[0], indices)
+    if indices.size == 0:
+        return dset[0:0]
+    # h5py needs increasing indices
+    indices_unique, inverse = np.unique(indices, return_inverse=True)
+    return dset[indices_unique][inverse]
+
+
+def imappend_h5(path, frames, frame_attrs=None, name="stack", compression="gzip"):
+    """Append frames to a stack of images in a HDF5 file
+
+    See :func:`ImageH5File.append_frames`.
+
+    """
+    with ImageH5File(path, "a") as f:
+        f.append_frames(name, frames, frame_attrs, compression=compression)
+
+
+def imread_stack_h5(path, frames=slice(None), name="stack"):
+    """Read frames of a stack of images in a HDF5 file
+
+    See :func:`ImageH5File.read_frames`.
+
+    """
+    with ImageH5File(path, "r") as f:
+        return f.read_frames(name, frames)
+
+
+class LazyImagesH5(Mapping):
+    """Mapping of the images of a group of a HDF5 file read on first access
+
+    The names of the images are read at construction but an image is read
+    only when it is accessed (and then kept in memory). The mapping can be
+    used after the file is closed (it is then reopened for each read).
+
+    Parameters
+    ----------
+
+    group : h5py.Group
+
+      Group containing the images (one dataset per image).
+
+    """
+
+    def __init__(self, group):
+        self._group = group
+        self.path = group.file.filename
+        self.name_group = group.name
+        self._keys = list(group.keys())
+        self._images = {}
+
+    def __repr__(self):
+        return (
+            f"<LazyImagesH5 {self.path}:{self.name_group} "
+            f"({len(self._images)}/{len(self)} images read)>"
+        )
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __getitem__(self, key):
+        try:
+            return self._images[key]
+        except KeyError:
+            pass
+        if key not in self._keys:
+            raise KeyError(key)
+        return self.load_many([key])[key]
+
+    def is_loaded(self, key):
+        """Check if an image has already been read."""
+        return key in self._images
+
+    def load_many(self, keys):
+        """Read images (the file is opened at most once) and return a dict."""
+        keys = list(keys)
+        for key in keys:
+            if key not in self._keys:
+                raise KeyError(key)
+        keys_to_read = [key for key in keys if key not in self._images]
+        if keys_to_read:
+            if self._group:
+                self._read(self._group, keys_to_read)
+            else:
+                with h5py.File(self.path, "r") as file:
+                    self._read(file[self.name_group], keys_to_read)
+        return {key: self._images[key] for key in keys}
+
+    def _read(self, group, keys):
+        for key in keys:
+            self._images[key] = _read_image_dataset(group[key])
 
 
 class ImageH5File(H5File):
+    """HDF5 file containing images (single images or stacks of frames)"""
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-    def load(self, group):
-        """Load images in the HDF5 file."""
+    def load(self, group, lazy=False):
+        """Load images in the HDF5 file.
+
+        Parameters
+        ----------
+
+        group : str
+
+          Name of the group containing the images.
+
+        lazy : bool, optional
+
+          If True, a :class:`LazyImagesH5` mapping (name of the image to
+          array) is returned (even for one image) and the images are read on
+          first access. Otherwise, the image (if there is only one image) or
+          a dictionary of images is returned.
+
+        """
+
+        if lazy:
+            return LazyImagesH5(self[group])
 
         images = self[group]
         nb_images = len(images)
         if nb_images == 1:
             dset = list(images.items())[0][1]
-            return dset[...]
+            return _read_image_dataset(dset)
 
         else:
             dico = {}
             for k, v in images.items():
-                dico[k] = v[...]
+                dico[k] = _read_image_dataset(v)
 
             return dico
 
@@ -215,6 +1114,102 @@ class ImageH5File(H5File):
         for k, v in list(dictattrs.items()):
             self.attrs[k] = v
 
+    def save_image(
+        self,
+        group,
+        name,
+        array,
+        compression="gzip",
+        tolerance=None,
+        scaleoffset=False,
+    ):
+        """Save an image (optionally with a lossy compression for floats)
+
+        Parameters
+        ----------
+
+        group : str
+
+          Name of the group (created if needed).
+
+        name : str
+
+          Name of the image (dataset).
+
+        array : numpy.ndarray
+
+          The image.
+
+        compression : str, optional
+
+          Compression filter ("gzip" or "lzf", used with the shuffle filter).
+
+        tolerance : float, optional
+
+          For float images, maximum absolute error of a lossy compression.
+          By default, the image is saved without loss. The image is
+          quantised to unsigned integers (with the attributes
+          ``scale_factor``, ``add_offset`` and ``_FillValue`` for NaN), or
+          saved with the scale-offset filter of HDF5 if ``scaleoffset`` is
+          True. The images are dequantised by :func:`ImageH5File.load`.
+
+        scaleoffset : bool, optional
+
+          Use the scale-offset filter of HDF5 (with the number of decimal
+          digits giving an error smaller than ``tolerance``). Arrays with NaN
+          are not supported.
+
+        Returns
+        -------
+
+        report : dict
+
+          Compression ratio (``"compression_ratio"``, size of the array
+          divided by the size of the dataset in the file) and maximum
+          absolute error (``"max_error"``).
+
+        """
+        array = np.asarray(array)
+        kwargs = dict(compression=compression, shuffle=True)
+        attrs = {}
+        data = array
+        lossy = tolerance is not None and np.issubdtype(array.dtype, np.floating)
+        if lossy and scaleoffset:
+            if np.isnan(array).any():
+                raise ValueError(
+                    "The scale-offset filter does not support NaN "
+                    "(use scaleoffset=False)"
+                )
+            tolerance_reduced = _reduce_tolerance(array, tolerance)
+            # values truncated to 10**(-nb_digits) (error < 10**(-nb_digits))
+            nb_digits = max(int(np.ceil(-np.log10(tolerance_reduced))), 0)
+            kwargs["scaleoffset"] = nb_digits
+        elif lossy:
+            data, attrs = _quantize(array, tolerance)
+
+        if group not in self:
+            self.create_group(group)
+        dset = self[group].create_dataset(name, data=data, **kwargs)
+        for key, value in attrs.items():
+            dset.attrs[key] = value
+
+        if lossy and array.size:
+            if scaleoffset:
+                # the chunks in the cache of the file are not filtered
+                result = _filter_scaleoffset(array, nb_digits)
+            else:
+                result = _read_image_dataset(dset)
+            error = np.abs(result.astype(np.float64) - array)
+            max_error = float(np.nanmax(error))
+        else:
+            max_error = 0.0
+        storage_size = dset.id.get_storage_size()
+        if storage_size:
+            compression_ratio = array.nbytes / storage_size
+        else:
+            compression_ratio = np.inf
+        return dict(compression_ratio=compression_ratio, max_error=max_error)
+
     def save_dict(self, keydict, dicttosave, **kwargs):
         """Save the dictionary `dicttosave` in the file."""
 
@@ -223,3 +1218,137 @@ class ImageH5File(H5File):
         if len(dicttosave) > 0:
             for k, v in list(dicttosave.items()):
                 group.create_dataset(k, data=v, **kwargs)
+
+    def append_frames(
+        self,
+        name,
+        frames,
+        frame_attrs=None,
+        compression="gzip",
+        compression_opts=None,
+    ):
+        """Append frames to a stack of images (created if needed)
+
+        A stack is a group containing one resizable dataset ``frames`` (with
+        one chunk per frame, compressed with the shuffle filter) and a group
+        ``frame_attrs`` (side table with one 1D dataset per attribute of the
+        frames).
+
+        Parameters
+        ----------
+
+        name : str
+
+          Name of the stack (group in the file).
+
+        frames : array_like
+
+          Frames to be appended (shape ``(nb_frames,) + shape_frame``).
+
+        frame_attrs : dict, optional
+
+          Attributes of the frames (name to sequence of length
+          ``nb_frames``). All appends of a stack have to give the same
+          attributes.
+
+        compression : str, optional
+
+          Compression filter (for example "gzip" or "lzf"), only used when
+          the stack is created.
+
+        compression_opts : optional
+
+          Options of the compression filter (for example the level for
+          "gzip"), only used when the stack is created.
+
+        """
+        frames = np.asarray(frames)
+        if frame_attrs is None:
+            frame_attrs = {}
+        frame_attrs = {
+            key: np.asarray(values) for key, values in frame_attrs.items()
+        }
+        nb_frames = frames.shape[0]
+        for key, values in frame_attrs.items():
+            if values.shape != (nb_frames,):
+                raise ValueError(
+                    f"frame_attrs[{key!r}].shape = {values.shape} != "
+                    f"({nb_frames},)"
+                )
+
+        if name not in self:
+            group = self.create_group(name)
+            group.create_dataset(
+                "frames",
+                shape=(0,) + frames.shape[1:],
+                maxshape=(None,) + frames.shape[1:],
+                dtype=frames.dtype,
+                chunks=(1,) + frames.shape[1:],
+                shuffle=True,
+                compression=compression,
+                compression_opts=compression_opts,
+            )
+            group_attrs = group.create_group("frame_attrs")
+            for key, values in frame_attrs.items():
+                dtype = values.dtype
+                if dtype.kind == "U":
+                    dtype = h5py.string_dtype()
+                group_attrs.create_dataset(
+                    key, shape=(0,), maxshape=(None,), dtype=dtype
+                )
+
+        group = self[name]
+        dset = group["frames"]
+        if frames.shape[1:] != dset.shape[1:]:
+            raise ValueError(
+                f"Shape of the frames {frames.shape[1:]} != {dset.shape[1:]}"
+            )
+        group_attrs = group["frame_attrs"]
+        if set(frame_attrs) != set(group_attrs):
+            raise ValueError(
+                f"Keys of frame_attrs {sorted(frame_attrs)} != "
+                f"{sorted(group_attrs)}"
+            )
+
+        start = dset.shape[0]
+        stop = start + nb_frames
+        dset.resize(stop, axis=0)
+        dset[start:stop] = frames
+        for key, values in frame_attrs.items():
+            dset_attr = group_attrs[key]
+            dset_attr.resize((stop,))
+            if values.dtype.kind == "U":
+                values = values.astype(object)
+            dset_attr[start:stop] = values
+
+    def get_nb_frames(self, name):
+        """Get the number of frames of a stack of images."""
+        return self[name]["frames"].shape[0]
+
+    def read_frames(self, name, frames=slice(None)):
+        """Read frames of a stack of images
+
+        Only the chunks of the selected frames are read and decompressed.
+
+        Parameters
+        ----------
+
+        name : str
+
+          Name of the stack.
+
+        frames : int, slice or sequence of int
+
+          Selection of the frames (for example ``slice(100, 200)``).
+
+        """
+        return _read_frames(self[name]["frames"], frames)
+
+    def read_frame_attrs(self, name, frames=slice(None)):
+        """Read the attributes of frames of a stack of images (dict)."""
+        frame_attrs = {}
+        for key, dset in self[name]["frame_attrs"].items():
+            if h5py.check_string_dtype(dset.dtype) is not None:
+                dset = dset.asstr()
+            frame_attrs[key] = _read_frames(dset, frames)
+        return frame_attrs
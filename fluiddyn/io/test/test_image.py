@@ -5,12 +5,35 @@ Test image saving and reading
 """
 
 import os
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
+from unittest.mock import patch
 
 import numpy as np
+import pytest
+from PIL import Image
 
-from ..image import imread, imread_h5, imsave, imsave_h5, use_opencv
+from .. import image as module_image
+from ..image import (
+    ImageH5File,
+    MovieReaderPool,
+    _read_into,
+    _read_roi_partial,
+    calibrate_imread_backends,
+    get_imread_backend,
+    imappend_h5,
+    imread,
+    imread_h5,
+    imread_stack_h5,
+    imsave,
+    imsave_h5,
+    load_imread_backends,
+    readers_by_extension,
+    save_imread_backends,
+    use_opencv,
+)
 
 
 def err_msg(_format, _type, path):
@@ -90,5 +113,456 @@ class TestImage(unittest.TestCase):
             )
 
 
+class TestImreadRoi(unittest.TestCase):
+    """Test imread with a region of interest."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path_dir = self._tmp_dir.name
+        self.image = np.arange(20 * 30, dtype=np.uint16).reshape((20, 30))
+        self.roi = (slice(2, 18, 3), slice(5, None, 2))
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_npy(self):
+        path = os.path.join(self.path_dir, "im.npy")
+        np.save(path, self.image)
+        np.testing.assert_array_equal(imread(path), self.image)
+        np.testing.assert_array_equal(
+            imread(path, roi=self.roi), self.image[self.roi]
+        )
+
+    def test_tiff(self):
+        tifffile = pytest.importorskip("tifffile")
+        path = os.path.join(self.path_dir, "im.tif")
+        tifffile.imwrite(path, self.image)
+        # uncompressed: memory-mapped
+        self.assertIsNotNone(_read_roi_partial(path, self.roi))
+        np.testing.assert_array_equal(
+            imread(path, roi=self.roi), self.image[self.roi]
+        )
+
+        tifffile.imwrite(path, self.image, compression="zlib")
+        self.assertIsNone(_read_roi_partial(path, self.roi))
+        np.testing.assert_array_equal(
+            imread(path, roi=self.roi), self.image[self.roi]
+        )
+
+    def test_png(self):
+        path = os.path.join(self.path_dir, "im.png")
+        imsave(path, self.image.astype(np.uint8))
+        image = imread(path, roi=self.roi)
+        np.testing.assert_array_equal(
+            image, self.image.astype(np.uint8)[self.roi]
+        )
+        self.assertTrue(image.flags.owndata)
+
+
+class TestImreadOut(unittest.TestCase):
+    """Test imread with out and dtype."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path_dir = self._tmp_dir.name
+        self.image = np.arange(20 * 30, dtype=np.uint16).reshape((20, 30))
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _check_out(self, path, image, direct):
+        out = np.zeros(image.shape, image.dtype)
+        self.assertEqual(_read_into(path, out), direct)
+        out = np.zeros(image.shape, image.dtype)
+        self.assertIs(imread(path, out=out), out)
+        np.testing.assert_array_equal(out, image)
+
+        # with conversion
+        buffer = np.zeros((2,) + image.shape, np.float32)
+        slot = buffer[1]
+        self.assertIs(imread(path, out=slot), slot)
+        np.testing.assert_array_equal(buffer[1], image)
+
+        image2 = imread(path, dtype=np.float64)
+        self.assertEqual(image2.dtype, np.float64)
+        np.testing.assert_array_equal(image2, image)
+
+        with self.assertRaises(ValueError):
+            imread(path, out=np.empty((3, 3), image.dtype))
+        with self.assertRaises(ValueError):
+            imread(path, out=out, dtype=np.float64)
+
+    def test_npy(self):
+        path = os.path.join(self.path_dir, "im.npy")
+        np.save(path, self.image)
+        self._check_out(path, self.image, direct=True)
+
+        roi = (slice(2, 5), slice(None, None, 3))
+        out = np.empty((3, 10), self.image.dtype)
+        self.assertTrue(_read_into(path, out, roi))
+        np.testing.assert_array_equal(out, self.image[roi])
+
+    def test_tiff(self):
+        tifffile = pytest.importorskip("tifffile")
+        path = os.path.join(self.path_dir, "im.tif")
+        tifffile.imwrite(path, self.image, compression="zlib")
+        self._check_out(path, self.image, direct=True)
+
+    def test_png(self):
+        path = os.path.join(self.path_dir, "im.png")
+        image = self.image.astype(np.uint8)
+        imsave(path, image)
+        self._check_out(path, image, direct=False)
+
+
+class TestImreadBackends(unittest.TestCase):
+    """Test the backends of imread."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path_dir = self._tmp_dir.name
+        self.image = np.arange(20 * 30, dtype=np.uint16).reshape((20, 30))
+        self.path = os.path.join(self.path_dir, "im.png")
+        imsave(self.path, self.image.astype(np.uint8))
+        self._patch_home = patch.dict(os.environ, {"HOME": self.path_dir})
+        self._patch_home.start()
+        load_imread_backends()
+
+    def tearDown(self):
+        self._patch_home.stop()
+        module_image._backends_user = None
+        self._tmp_dir.cleanup()
+
+    def test_backends(self):
+        image = self.image.astype(np.uint8)
+        for name in readers_by_extension[".png"]:
+            if name == "matplotlib":
+                # floats between 0 and 1
+                continue
+            np.testing.assert_array_equal(
+                imread(self.path, backend=name), image, err_msg=name
+            )
+        np.testing.assert_array_equal(
+            imread(self.path, roi=(slice(2, 5),), backend="pillow"), image[2:5]
+        )
+        with self.assertRaises(ValueError):
+            imread(self.path, backend="unknown")
+
+    def test_default_backend(self):
+        readers = readers_by_extension[".png"]
+        for name in ("pillow", "matplotlib"):
+            if name not in readers:
+                self.skipTest(f"{name} not available")
+        # without opencv and imageio, PNG files are read with matplotlib
+        with patch.dict(
+            readers_by_extension,
+            {".png": {name: readers[name] for name in ("pillow", "matplotlib")}},
+        ):
+            self.assertEqual(
+                module_image._get_default_backend(".png"), "matplotlib"
+            )
+
+    def test_other_extensions(self):
+        image = self.image.astype(np.uint8)
+        for name, format in (("im.gif", "GIF"), ("im.pgm", "PPM"), ("im", "PNG")):
+            path = os.path.join(self.path_dir, name)
+            Image.fromarray(image).save(path, format=format)
+            self.assertNotEqual(get_imread_backend(path), "numpy")
+            np.testing.assert_array_equal(imread(path), image, err_msg=name)
+
+    def test_calibrate(self):
+        durations = calibrate_imread_backends([self.path], nb_repeat=1)
+        self.assertNotIn("matplotlib", durations[".png"])
+        self.assertIn("pillow", durations[".png"])
+
+        path_corrupted = os.path.join(self.path_dir, "corrupted.png")
+        with open(path_corrupted, "wb") as file:
+            file.write(b"not a png file")
+        with self.assertWarns(UserWarning):
+            durations = calibrate_imread_backends(
+                [path_corrupted, self.path], nb_repeat=1
+            )
+        self.assertIn("pillow", durations[".png"])
+
+        path_config = os.path.join(self.path_dir, ".fluiddyn", "config.py")
+        os.makedirs(os.path.dirname(path_config))
+        with open(path_config, "w") as file:
+            file.write("a = 1")
+        save_imread_backends({".png": "pillow"})
+        self.assertEqual(get_imread_backend("foo.png"), "pillow")
+        save_imread_backends({".png": "matplotlib", ".tif": "unknown"})
+        self.assertEqual(get_imread_backend("foo.png"), "matplotlib")
+        # unavailable backend: default backend
+        self.assertNotEqual(get_imread_backend("foo.tif"), "unknown")
+        with open(path_config) as file:
+            text = file.read()
+        self.assertTrue(text.startswith("a = 1\n"))
+        self.assertEqual(text.count("imread_backends = "), 1)
+
+
+class TestImageStackH5(unittest.TestCase):
+    """Test the stacks of images in HDF5 files."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp_dir.name, "stack.h5")
+        self.frames = np.arange(10 * 4 * 5, dtype=np.uint16).reshape((10, 4, 5))
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_stack(self):
+        times = np.arange(10) / 10
+        labels = [f"frame{index}" for index in range(10)]
+        for start in (0, 4):
+            stop = start + (4 if start == 0 else 6)
+            imappend_h5(
+                self.path,
+                self.frames[start:stop],
+                dict(time=times[start:stop], label=labels[start:stop]),
+            )
+
+        with ImageH5File(self.path, "r") as f:
+            self.assertEqual(f.get_nb_frames("stack"), 10)
+            dset = f["stack/frames"]
+            self.assertEqual(dset.chunks, (1, 4, 5))
+            self.assertTrue(dset.shuffle)
+            np.testing.assert_array_equal(f.read_frames("stack"), self.frames)
+            np.testing.assert_array_equal(
+                f.read_frames("stack", 3), self.frames[3]
+            )
+            np.testing.assert_array_equal(
+                f.read_frames("stack", slice(8, 1, -3)), self.frames[8:1:-3]
+            )
+            np.testing.assert_array_equal(
+                f.read_frames("stack", [7, 2, 7, -1]), self.frames[[7, 2, 7, -1]]
+            )
+            selection = np.array([-1, 2], dtype=np.intp)
+            np.testing.assert_array_equal(
+                f.read_frames("stack", selection), self.frames[[-1, 2]]
+            )
+            np.testing.assert_array_equal(selection, [-1, 2])
+            frame_attrs = f.read_frame_attrs("stack", slice(2, 5))
+            np.testing.assert_array_equal(frame_attrs["time"], times[2:5])
+            self.assertEqual(list(frame_attrs["label"]), labels[2:5])
+
+        np.testing.assert_array_equal(
+            imread_stack_h5(self.path, slice(5, 7)), self.frames[5:7]
+        )
+
+        with self.assertRaises(ValueError):
+            imappend_h5(self.path, self.frames[:2, :2])
+        with self.assertRaises(ValueError):
+            imappend_h5(self.path, self.frames[:2])
+
+    def test_lzf(self):
+        imappend_h5(self.path, self.frames, compression="lzf")
+        with ImageH5File(self.path, "r") as f:
+            self.assertEqual(f["stack/frames"].compression, "lzf")
+        np.testing.assert_array_equal(imread_stack_h5(self.path), self.frames)
+
+
+class TestLazyImagesH5(unittest.TestCase):
+    """Test the lazy loading of the images of HDF5 files."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp_dir.name, "images.h5")
+        self.images = {
+            f"im{index}": np.full((4, 5), index, dtype=np.uint8)
+            for index in range(5)
+        }
+        with ImageH5File(self.path, "w") as f:
+            f.save_dict("images", self.images)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_open_file(self):
+        with ImageH5File(self.path, "r") as f:
+            images = f.load("images", lazy=True)
+            self.assertEqual(sorted(images), sorted(self.images))
+            np.testing.assert_array_equal(images["im3"], self.images["im3"])
+            self.assertTrue(images.is_loaded("im3"))
+            self.assertFalse(images.is_loaded("im2"))
+            loaded = images.load_many(["im0", "im3"])
+            self.assertEqual(list(loaded), ["im0", "im3"])
+            self.assertFalse(images.is_loaded("im1"))
+        with self.assertRaises(KeyError):
+            images["unknown"]
+
+    def test_closed_file(self):
+        images = imread_h5(self.path, lazy=True)
+        self.assertEqual(len(images), 5)
+        self.assertIn("im4", images)
+        np.testing.assert_array_equal(images["im4"], self.images["im4"])
+        for key, image in images.load_many(["im1", "im2"]).items():
+            np.testing.assert_array_equal(image, self.images[key])
+        self.assertIn("3/5", repr(images))
+
+
+class TestImsaveH5Tolerance(unittest.TestCase):
+    """Test the lossy compression of float images in HDF5 files."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp_dir.name, "im.h5")
+        rng = np.random.default_rng(0)
+        self.image = rng.normal(size=(64, 64)).cumsum(0).astype(np.float32)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_quantization(self):
+        image = self.image.copy()
+        image[3, 4] = np.nan
+        report_lossless = imsave_h5(self.path, image)
+        self.assertEqual(report_lossless["max_error"], 0.0)
+
+        for tolerance in (1e-3, 1e-1):
+            report = imsave_h5(self.path, image, tolerance=tolerance)
+            self.assertLessEqual(report["max_error"], tolerance)
+            self.assertGreater(
+                report["compression_ratio"],
+                report_lossless["compression_ratio"],
+            )
+            image2 = imread_h5(self.path)
+            self.assertEqual(image2.dtype, np.float32)
+            self.assertTrue(np.isnan(image2[3, 4]))
+            error = np.nanmax(abs(image2.astype(np.float64) - image))
+            self.assertAlmostEqual(error, report["max_error"])
+            self.assertLessEqual(error, tolerance)
+
+        with self.assertRaises(ValueError):
+            imsave_h5(self.path, image, tolerance=0)
+
+        image = self.image.copy()
+        image[5, 6] = np.inf
+        for scaleoffset in (False, True):
+            with self.assertRaisesRegex(ValueError, "infinite"):
+                imsave_h5(
+                    self.path, image, tolerance=0.1, scaleoffset=scaleoffset
+                )
+
+        # no effect for integer images
+        image = np.arange(20, dtype=np.uint16).reshape((4, 5))
+        report = imsave_h5(self.path, image, tolerance=2)
+        self.assertEqual(report["max_error"], 0)
+        np.testing.assert_array_equal(imread_h5(self.path), image)
+
+    def test_foreign_scale_factor(self):
+        # dataset with CF attributes not written by imsave_h5
+        data = np.arange(20, dtype=np.int16).reshape((4, 5))
+        with ImageH5File(self.path, "w") as f:
+            dset = f.create_group("images").create_dataset("im", data=data)
+            dset.attrs["scale_factor"] = 0.5
+            dset.attrs["add_offset"] = 1.0
+        np.testing.assert_array_equal(imread_h5(self.path), data)
+
+    def test_scaleoffset(self):
+        tolerance = 1e-2
+        report = imsave_h5(
+            self.path, self.image, tolerance=tolerance, scaleoffset=True
+        )
+        self.assertLessEqual(report["max_error"], tolerance)
+        image2 = imread_h5(self.path)
+        error = np.max(abs(image2.astype(np.float64) - self.image))
+        self.assertAlmostEqual(error, report["max_error"])
+        self.assertLessEqual(error, tolerance)
+
+        image = self.image.copy()
+        image[0, 0] = np.nan
+        with self.assertRaises(ValueError):
+            imsave_h5(self.path, image, tolerance=tolerance, scaleoffset=True)
+
+
+class FakeMovieReader:
+    """Minimal reader mimicking a pims reader."""
+
+    nb_opened = 0
+
+    def __init__(self, path):
+        type(self).nb_opened += 1
+        self.path = path
+        self.closed = False
+
+    def get_frame(self, index):
+        assert not self.closed
+        return np.full((2, 2), index)
+
+    def len(self):
+        return 10
+
+    def close(self):
+        self.closed = True
+
+
+class TestMovieReaderPool(unittest.TestCase):
+    """Test the pool of open movie readers."""
+
+    def test_pool(self):
+        FakeMovieReader.nb_opened = 0
+        pool = MovieReaderPool(max_nb_readers=2, open_reader=FakeMovieReader)
+        self.assertEqual(pool.get_frame("a.cine", 3)[0, 0], 3)
+        self.assertEqual(pool.get_nb_frames("a.cine"), 10)
+        self.assertEqual(FakeMovieReader.nb_opened, 1)
+
+        reader_a = pool._get_reader("a.cine").reader
+        pool.get_frame("b.cine", 0)
+        pool.get_frame("a.cine", 0)
+        # b.cine is the least recently used reader
+        pool.get_frame("c.cine", 0)
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(FakeMovieReader.nb_opened, 3)
+        self.assertFalse(reader_a.closed)
+        pool.get_frame("b.cine", 0)
+        self.assertEqual(FakeMovieReader.nb_opened, 4)
+        self.assertTrue(reader_a.closed)
+
+        # readers inherited after a fork are not used
+        pool._pid = -1
+        reader_b = pool._get_reader("b.cine").reader
+        self.assertEqual(FakeMovieReader.nb_opened, 5)
+        self.assertEqual(len(pool), 1)
+
+        pool.close()
+        self.assertEqual(len(pool), 0)
+        self.assertTrue(reader_b.closed)
+
+    def test_evicted_reader(self):
+        FakeMovieReader.nb_opened = 0
+        pool = MovieReaderPool(max_nb_readers=1, open_reader=FakeMovieReader)
+        pooled_a = pool._get_reader("a.cine")
+        # eviction (by another thread) before the reader is used
+        pool.get_frame("b.cine", 0)
+        self.assertTrue(pooled_a.closed)
+
+        get_reader = pool._get_reader
+        pooled_readers = [pooled_a]
+
+        def get_reader_stale(path):
+            if pooled_readers:
+                return pooled_readers.pop()
+            return get_reader(path)
+
+        pool._get_reader = get_reader_stale
+        self.assertEqual(pool.get_frame("a.cine", 4)[0, 0], 4)
+        self.assertEqual(FakeMovieReader.nb_opened, 3)
+        pool.close()
+
+    def test_threads(self):
+        pool = MovieReaderPool(max_nb_readers=2, open_reader=FakeMovieReader)
+        paths = [f"{index}.cine" for index in range(5)]
+
+        def read(index):
+            return pool.get_frame(paths[index % len(paths)], index)[0, 0]
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(read, range(500)))
+        self.assertEqual(results, list(range(500)))
+        self.assertLessEqual(len(pool), 2)
+        pool.close()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,7 +2,8 @@
 Serie of arrays
 ===============
 
-Provides classes to iterate over numbered files in a directory:
+Provides classes to iterate over numbered files in a directory or over the
+arrays of a dataset of a HDF5 file:
 
 .. autoclass:: SerieOfArrays
    :members:
@@ -12,34 +13,464 @@ Provides classes to iterate over numbered files in a directory:
    :members:
    :private-members:
 
+.. autoclass:: SerieOfArraysFromHDF5
+   :members:
+   :private-members:
+
 .. autoclass:: SeriesOfArrays
    :members:
    :private-members:
 
+.. autoclass:: ReadPlan
+   :members:
+
+.. autoclass:: ArrayCache
+   :members:
+
 """
 
+import ast
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
 import itertools
 import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
 import warnings
-from copy import copy, deepcopy
-from functools import wraps
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from copy import copy
+from fnmatch import filter as fnmatch_filter
+from functools import partial, wraps
 from glob import escape, glob
-from math import ceil, log10
+from math import ceil, log10, prod
+from operator import itemgetter
+from zipfile import BadZipFile
 
+import h5py
+import numpy as np
 from simpleeval import simple_eval
 
 from fluiddyn.io import Path
-from fluiddyn.io.image import extensions_movies, imread
-
-try:
-    import pims
-except ImportError:
-    pass
+from fluiddyn.io.image import extensions_movies, imread, movie_readers
+from fluiddyn.util import mpi
 
 
 def get_nb_arrays_in_file(fname):
-    with pims.open(fname) as images:
-        return images.len()
+    return movie_readers.get_nb_frames(fname)
+
+
+def _decode_names(names):
+    """Decode names stored in an index file (see SerieOfArraysFromFiles)"""
+    return names.tobytes().decode().split("\n")
+
+
+def _list_names_in_dir(path_dir):
+    """List the names of the entries of a directory (one ``os.scandir`` pass)"""
+    # path_dir is "" for a path in the current directory
+    with os.scandir(path_dir or os.curdir) as entries:
+        return [entry.name for entry in entries]
+
+
+def _imap_ordered(executor, func, iterable, nb_in_flight):
+    """Apply ``func`` on the items of ``iterable`` with an executor
+
+    The results are yielded in the order of ``iterable`` and at most
+    ``nb_in_flight`` tasks are submitted in advance. An exception raised by a
+    task is raised when its result would have been yielded.
+
+    """
+    iterator = iter(iterable)
+    futures = deque(
+        executor.submit(func, arg)
+        for arg in itertools.islice(iterator, max(nb_in_flight, 1))
+    )
+    try:
+        while futures:
+            future = futures.popleft()
+            for arg in itertools.islice(iterator, 1):
+                futures.append(executor.submit(func, arg))
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def _aimap_ordered(func, iterable, nb_in_flight, executor=None):
+    """Asynchronous version of :func:`_imap_ordered`
+
+    ``func`` is called in ``executor`` (by default a new thread pool with
+    ``nb_in_flight`` threads, shut down at the end of the iteration).
+
+    """
+    loop = asyncio.get_running_loop()
+    nb_in_flight = max(nb_in_flight, 1)
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(nb_in_flight)
+    iterator = iter(iterable)
+    futures = deque(
+        loop.run_in_executor(executor, func, arg)
+        for arg in itertools.islice(iterator, nb_in_flight)
+    )
+    try:
+        while futures:
+            future = futures.popleft()
+            for arg in itertools.islice(iterator, 1):
+                futures.append(loop.run_in_executor(executor, func, arg))
+            yield await future
+    finally:
+        for future in futures:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _fadvise(path, advice):
+    """Give an advice ("WILLNEED" or "DONTNEED") on the use of a file to the OS
+
+    Does nothing if ``os.posix_fadvise`` is not available or fails.
+
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, getattr(os, "POSIX_FADV_" + advice))
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _compute_roi_slices(roi=None, step=None):
+    """Combine a region of interest and a step in a tuple of slices
+
+    ``roi`` is a slice or a tuple of slices (for the first dimensions of the
+    arrays) and ``step`` an int (for the 2 first dimensions or all the
+    dimensions of ``roi``) or a tuple of int. Returns None for full arrays.
+
+    """
+    if roi is None and step is None:
+        return None
+    if roi is None:
+        roi = ()
+    elif isinstance(roi, slice):
+        roi = (roi,)
+    roi = tuple(roi)
+    if step is None:
+        steps = ()
+    elif isinstance(step, (int, np.integer)):
+        steps = (step,) * max(len(roi), 2)
+    else:
+        steps = tuple(step)
+    nb_dims = max(len(roi), len(steps))
+    roi = roi + (slice(None),) * (nb_dims - len(roi))
+    steps = steps + (1,) * (nb_dims - len(steps))
+    slices = []
+    for slice_, step_dim in zip(roi, steps):
+        if not isinstance(slice_, slice):
+            raise ValueError(f"roi should contain slices (not {slice_!r})")
+        step_slice = 1 if slice_.step is None else slice_.step
+        if step_slice <= 0 or step_dim <= 0:
+            raise ValueError("Only positive steps are supported for roi/step.")
+        slices.append(slice(slice_.start, slice_.stop, step_slice * step_dim))
+    return tuple(slices)
+
+
+def _hashable_roi(roi):
+    """Hashable version of a tuple of slices (used as key of caches)"""
+    return tuple((s.start, s.stop, s.step) for s in roi)
+
+
+def _iter_chunks(iterable, size):
+    """Yield lists of (at most) ``size`` items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _imread_in_dir(path_dir, name):
+    return imread(os.path.join(path_dir, name))
+
+
+def _apply_on_series(func, get_array_from_name, names_series):
+    """Load the arrays of series and apply ``func`` (see SeriesOfArrays.map)"""
+    return [
+        func(tuple(get_array_from_name(name) for name in names))
+        for names in names_series
+    ]
+
+
+def _partition_index_series(index_series, nb_proc, mode="block", weights=None):
+    """Split index series in ``nb_proc`` disjoint parts
+
+    Returns a list containing a list of index series for each process.
+
+    """
+    index_series = list(index_series)
+    if mode == "cyclic":
+        if weights is not None:
+            raise ValueError("Weights can only be used with mode='block'.")
+        return [index_series[rank::nb_proc] for rank in range(nb_proc)]
+
+    if mode != "block":
+        raise ValueError(f'mode should be "block" or "cyclic" (not {mode!r})')
+
+    if weights is None:
+        return [
+            [int(index) for index in part]
+            for part in np.array_split(np.array(index_series, dtype=int), nb_proc)
+        ]
+
+    # contiguous parts with approximately equal total weights
+    weights = np.asarray(weights, dtype=float)
+    total = weights.sum()
+    if total == 0:
+        return _partition_index_series(index_series, nb_proc)
+    middles = np.cumsum(weights) - weights / 2
+    ranks = np.minimum((middles * nb_proc / total).astype(int), nb_proc - 1)
+    parts = [[] for _ in range(nb_proc)]
+    for index, rank in zip(index_series, ranks):
+        parts[rank].append(index)
+    return parts
+
+
+# inotify constants (see the header sys/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+
+
+def _inotify_init(path_dir):
+    """Get a inotify file descriptor watching a directory
+
+    Returns None if inotify is not available.
+
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    watch = libc.inotify_add_watch(
+        fd, os.fsencode(path_dir or os.curdir), _IN_CLOSE_WRITE | _IN_MOVED_TO
+    )
+    if watch < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _inotify_read_names(fd, timeout):
+    """Wait for inotify events and return the names of the files concerned"""
+    readable, _, _ = select.select([fd], [], [], timeout)
+    if not readable:
+        return []
+    try:
+        data = os.read(fd, 65536)
+    except BlockingIOError:
+        return []
+    names = []
+    offset = 0
+    size_header = struct.calcsize("iIII")
+    while offset < len(data):
+        _, mask, _, length = struct.unpack_from("iIII", data, offset)
+        offset += size_header
+        name = data[offset : offset + length].rstrip(b"\0")
+        offset += length
+        if name and not mask & _IN_Q_OVERFLOW:
+            names.append(os.fsdecode(name))
+    return names
+
+
+class _FilesWatcher:
+    """Wait for complete files of a serie (used in follow mode)
+
+    A file is considered as complete if it has been closed after writing or
+    moved in the directory (detected with inotify on Linux) or if it has not
+    been modified since ``stable_time`` seconds. The index of the existing
+    files of the serie is updated when new files are found.
+
+    """
+
+    def __init__(self, serie, poll_period=0.5, stable_time=1.0):
+        self.serie = serie
+        self.poll_period = poll_period
+        self.stable_time = stable_time
+        self._names_closed = set()
+        self._names_complete = set()
+        self._fd = _inotify_init(serie.path_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _is_complete(self, name_file):
+        if name_file in self._names_complete:
+            return True
+        try:
+            mtime = os.stat(os.path.join(self.serie.path_dir, name_file)).st_mtime
+        except FileNotFoundError:
+            return False
+        if (
+            name_file in self._names_closed
+            or time.time() - mtime >= self.stable_time
+        ):
+            # only complete files are added to the index (used by the
+            # existence checks)
+            self.serie._add_files_to_index([name_file])
+            self._names_complete.add(name_file)
+            return True
+        return False
+
+    def wait_for_files(self, names_files, timeout):
+        """Wait until files are complete (returns False after ``timeout`` s)"""
+        deadline = time.monotonic() + timeout
+        names_files = list(names_files)
+        while True:
+            names_files = [
+                name for name in names_files if not self._is_complete(name)
+            ]
+            if not names_files:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._wait(min(remaining, self.poll_period))
+
+    def _wait(self, duration):
+        if self._fd is None:
+            time.sleep(duration)
+        else:
+            self._names_closed.update(
+                fnmatch_filter(
+                    _inotify_read_names(self._fd, duration),
+                    self.serie._str_glob_file_names,
+                )
+            )
+
+
+class ArrayCache:
+    """Cache of arrays with a memory budget and a LRU eviction policy
+
+    An instance can be shared by several series (see
+    :func:`SerieOfArraysFromFiles.set_cache`) so that arrays used by
+    overlapping series are read only once. Copies of the series (in particular
+    with :func:`copy.deepcopy`) share the same cache.
+
+    The arrays stored in the cache are made read-only since they can be
+    returned to different consumers.
+
+    Parameters
+    ----------
+
+    max_nbytes : int
+
+      Memory budget in bytes. Arrays larger than this budget are not cached.
+
+    Attributes
+    ----------
+
+    nb_hits : int
+      Number of arrays obtained from the cache.
+
+    nb_misses : int
+      Number of arrays that had to be loaded.
+
+    nbytes : int
+      Number of bytes used by the arrays in the cache.
+
+    """
+
+    def __init__(self, max_nbytes):
+        self.max_nbytes = int(max_nbytes)
+        self.nbytes = 0
+        self.nb_hits = 0
+        self.nb_misses = 0
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(max_nbytes={self.max_nbytes}, "
+            f"nbytes={self.nbytes}, nb_arrays={len(self)}, "
+            f"nb_hits={self.nb_hits}, nb_misses={self.nb_misses})"
+        )
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __contains__(self, key):
+        return key in self._arrays
+
+    def get(self, key):
+        """Get an array from the cache (None if the key is not in the cache)."""
+        with self._lock:
+            try:
+                array = self._arrays[key]
+            except KeyError:
+                self.nb_misses += 1
+                return None
+            self._arrays.move_to_end(key)
+            self.nb_hits += 1
+            return array
+
+    def put(self, key, array):
+        """Store an array in the cache and evict the least recently used ones."""
+        nbytes = array.nbytes
+        if nbytes > self.max_nbytes:
+            return
+        array.flags.writeable = False
+        with self._lock:
+            old = self._arrays.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._arrays[key] = array
+            self.nbytes += nbytes
+            while self.nbytes > self.max_nbytes:
+                _, evicted = self._arrays.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def get_or_load(self, key, load):
+        """Get an array from the cache or load it with ``load(key)``."""
+        array = self.get(key)
+        if array is None:
+            array = load(key)
+            self.put(key, array)
+        return array
+
+    def clear(self):
+        """Remove all arrays from the cache and reset the counters."""
+        with self._lock:
+            self._arrays.clear()
+            self.nbytes = 0
+            self.nb_hits = 0
+            self.nb_misses = 0
 
 
 ALPHABET_SIZE = 26
@@ -83,8 +514,137 @@ def _letter_from_number(number):
     return chr(97 + number)
 
 
+def _escape_braces(string):
+    """Escape a string to be used in a format string"""
+    return string.replace("{", "{{").replace("}", "}}")
+
+
 MAX_SEARCH_INDEX_START = 100000
 
+_VERSION_INDEX_FILE = 2
+# larger than the resolution of the mtime of most file systems
+_RESOLUTION_MTIME_NS = 2_000_000_000
+
+
+class _IndicesExistingFiles:
+    """Set-like container of the indices of the existing files
+
+    The indices are stored in a dense boolean array covering their bounding
+    box, except when this array would be too sparse (a set of tuples is then
+    used).
+
+    Parameters
+    ----------
+
+    indices : numpy.ndarray
+
+      Array of shape ``(nb_files, nb_indices)``.
+
+    """
+
+    def __init__(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        # bounding box of the indices
+        self._starts = tuple(indices.min(0).tolist())
+        self._shape = tuple((indices.max(0) + 1 - self._starts).tolist())
+        size = int(np.prod(self._shape))
+        if size <= max(4 * len(indices), 1024):
+            self._set = None
+            self._grid_starts = self._starts
+            self._grid = np.zeros(self._shape, dtype=bool)
+            self._grid[tuple((indices - self._starts).T)] = True
+            self._nb_files = int(self._grid.sum())
+        else:
+            self._grid = None
+            self._set = set(map(tuple, indices.tolist()))
+
+    def __contains__(self, indices):
+        if self._set is not None:
+            return indices in self._set
+        relative = []
+        for index, start, size in zip(
+            indices, self._grid_starts, self._grid.shape
+        ):
+            index -= start
+            if index < 0 or index >= size:
+                return False
+            relative.append(index)
+        return bool(self._grid[tuple(relative)])
+
+    def copy(self):
+        """Copy of the index (which can be modified independently)"""
+        new = copy(self)
+        if self._set is not None:
+            new._set = set(self._set)
+        else:
+            new._grid = self._grid.copy()
+        return new
+
+    def add(self, indices):
+        """Add the indices of a file"""
+        indices = tuple(indices)
+        if indices in self:
+            return
+        stops = [start + size for start, size in zip(self._starts, self._shape)]
+        self._starts = tuple(map(min, self._starts, indices))
+        self._shape = tuple(
+            max(stop, index + 1) - start
+            for stop, index, start in zip(stops, indices, self._starts)
+        )
+        if self._set is not None:
+            self._set.add(indices)
+            return
+        relative = tuple(
+            index - start for index, start in zip(indices, self._grid_starts)
+        )
+        if not all(
+            0 <= index < size for index, size in zip(relative, self._grid.shape)
+        ):
+            self._grow_grid(indices)
+            if self._set is not None:
+                self._set.add(indices)
+                return
+            relative = tuple(
+                index - start for index, start in zip(indices, self._grid_starts)
+            )
+        self._grid[relative] = True
+        self._nb_files += 1
+
+    def _grow_grid(self, indices):
+        """Grow the grid geometrically (so that adding files is O(1) on
+        average) or switch to the set representation if it would be too
+        sparse"""
+        starts = []
+        stops = []
+        for index, start, size in zip(
+            indices, self._grid_starts, self._grid.shape
+        ):
+            stop = start + size
+            if index < start:
+                start = min(index, start - size)
+            elif index >= stop:
+                stop = max(index + 1, stop + size)
+            starts.append(start)
+            stops.append(stop)
+        shape = tuple(stop - start for start, stop in zip(starts, stops))
+        if int(np.prod(shape)) > max(8 * (self._nb_files + 1), 1024):
+            self._set = set(
+                map(tuple, (np.argwhere(self._grid) + self._grid_starts).tolist())
+            )
+            self._grid = None
+            return
+        grid = np.zeros(shape, dtype=bool)
+        grid[
+            tuple(
+                slice(old - new, old - new + size)
+                for old, new, size in zip(
+                    self._grid_starts, starts, self._grid.shape
+                )
+            )
+        ] = self._grid
+        self._grid = grid
+        self._grid_starts = tuple(starts)
+
 
 def compute_slices(str_slices):
     """Return a tuple of slices"""
@@ -114,6 +674,12 @@ def compute_slices(str_slices):
 class SerieOfArrays:
     """Serie of arrays used for post-processing.
 
+    This base class implements the methods based on the "slicing tuples" of
+    the serie. Subclasses have to define the attributes ``nb_indices``,
+    ``_slicing_tuples`` and ``_slicing_tuples_all_files`` and the methods
+    ``compute_name_from_indices``, ``get_array_from_name``,
+    ``_check_all_files_exist`` and ``_check_all_arrays_exist``.
+
     Parameters
     ----------
 
@@ -127,16 +693,29 @@ class SerieOfArrays:
 
     """
 
+    _is_view = False
+
     def __init__(self, path):
+        self._cache = None
         path = os.path.expanduser(path)
+        # names obtained when scanning the directory (reused by subclasses)
+        self._names_in_dir_scanned = None
         if os.path.isfile(path):
             self.path_dir, self.filename_given = os.path.split(path)
         elif os.path.isdir(path):
             self.path_dir = path
-            sep = os.path.sep
-            filelist = glob(path + sep + "*")
-            filelist.sort()
-            self.filename_given = filelist[0].split(sep)[-1]
+            self._names_in_dir_scanned = _list_names_in_dir(path)
+            names = [
+                name
+                for name in self._names_in_dir_scanned
+                if not name.startswith(".")
+            ]
+            if not names:
+                raise ValueError(
+                    "The provided path points towards an empty directory:\n"
+                    + path
+                )
+            self.filename_given = min(names)
         else:
             if len(path) == 0:
                 raise ValueError(
@@ -169,6 +748,469 @@ class SerieOfArrays:
         else:
             self.extension_file = ""
 
+    def set_slicing_tuples_from_str(self, str_slices):
+        """Set slicing_tuples from a string."""
+        slices = compute_slices(str_slices)
+        slicing_tuples = []
+        for slice_ in slices:
+            if isinstance(slice_, slice):
+                step = slice_.step or 1
+                slicing_tuples.append((slice_.start, slice_.stop, step))
+            else:
+                slicing_tuples.append(slice_)
+        self.set_slicing_tuples(*slicing_tuples)
+
+    def get_arrays(self, roi=None, step=None):
+        """Get the arrays on the serie.
+
+        See :func:`SerieOfArraysFromFiles.get_array_from_name` for ``roi`` and
+        ``step``.
+
+        """
+        return tuple(a for a in self.iter_arrays(roi=roi, step=step))
+
+    def get_stacked_array(
+        self,
+        out=None,
+        dtype=None,
+        memmap_path=None,
+        nb_workers=1,
+        roi=None,
+        step=None,
+    ):
+        """Get the arrays of the serie stacked in one array.
+
+        The shape and the dtype of the first array are used to allocate the
+        result and each array is copied in its slot just after having been
+        read, so that the peak memory is approximately the size of the
+        result.
+
+        Parameters
+        ----------
+
+        out : numpy.ndarray, optional
+
+          Array (or numpy.memmap) of shape ``(len(serie),) + shape_array`` used
+          to store the arrays.
+
+        dtype : numpy.dtype, optional
+
+          Dtype of the result (default: dtype of the first array). Only used
+          when ``out`` is not given.
+
+        memmap_path : str, optional
+
+          If given and ``out`` is None, the result is a :class:`numpy.memmap`
+          stored in this file.
+
+        nb_workers : int
+
+          Number of threads used to read the arrays.
+
+        roi, step :
+
+          Region of interest and step (see
+          :func:`SerieOfArraysFromFiles.get_array_from_name`).
+
+        """
+        names = self.get_name_arrays()
+        if not names:
+            raise ValueError("The serie does not contain any array.")
+
+        first = self.get_array_from_name(names[0], roi=roi, step=step)
+        shape = (len(names),) + first.shape
+        if out is None:
+            if dtype is None:
+                dtype = first.dtype
+            if memmap_path is None:
+                out = np.empty(shape, dtype=dtype)
+            else:
+                out = np.memmap(memmap_path, dtype=dtype, mode="w+", shape=shape)
+        elif out.shape != shape:
+            raise ValueError(f"out.shape = {out.shape} != {shape}")
+
+        out[0] = first
+        del first
+
+        def read_into_slot(index):
+            self._read_array_into(names[index], out[index], roi, step)
+
+        indices = range(1, len(names))
+        if nb_workers > 1:
+            with ThreadPoolExecutor(nb_workers) as executor:
+                for _ in executor.map(read_into_slot, indices):
+                    pass
+        else:
+            for index in indices:
+                read_into_slot(index)
+
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out
+
+    def _read_array_into(self, name, out, roi=None, step=None):
+        """Read an array and store it in ``out`` (without allocation if possible)"""
+        out[...] = self.get_array_from_name(name, roi=roi, step=step)
+
+    def get_name_arrays(self):
+        """Get the name of the arrays of the serie."""
+        return tuple(n for n in self.iter_name_arrays())
+
+    def set_cache(self, cache):
+        """Set the cache used to get the arrays.
+
+        Parameters
+        ----------
+
+        cache : None, int or ArrayCache
+
+          An integer is used as the memory budget (in bytes) of a new
+          :class:`ArrayCache`. None disables the cache.
+
+        """
+        if cache is not None and not isinstance(cache, ArrayCache):
+            cache = ArrayCache(cache)
+        self._cache = cache
+
+    def get_cache(self):
+        """Get the cache used to get the arrays (None if there is no cache)."""
+        return self._cache
+
+    def get_array_from_indices(self, *indices, roi=None, step=None):
+        """Get an array from its indices.
+
+        Parameters
+        ----------
+
+        *indices :
+
+          As many indices as used in the serie. For example with names of the
+          form 'im100a.png', 2 indices are needed.
+
+        roi, step :
+
+          Region of interest and step (see
+          :func:`SerieOfArraysFromFiles.get_array_from_name`).
+
+        """
+        return self.get_array_from_name(
+            self.compute_name_from_indices(*indices), roi=roi, step=step
+        )
+
+    def get_tuples_indices(self):
+        """Get a list of tuples containing the indices computed from `self._slicing_tuples`"""
+        return [
+            tuple(range(*start_stop_step))
+            for start_stop_step in self._slicing_tuples
+        ]
+
+    def _get_ranges_sizes(self):
+        ranges = [range(*s) for s in self._slicing_tuples]
+        return ranges, [len(r) for r in ranges]
+
+    def get_indices_from_index(self, index):
+        """Get indices from a flatten index"""
+        ranges, sizes = self._get_ranges_sizes()
+        nb_arrays = prod(sizes)
+        if index < 0:
+            index += nb_arrays
+        if not 0 <= index < nb_arrays:
+            raise IndexError(f"index {index} out of range")
+        indices = []
+        for range_, size in zip(reversed(ranges), reversed(sizes)):
+            index, position = divmod(index, size)
+            indices.append(range_[position])
+        return tuple(reversed(indices))
+
+    def get_indices_from_index_array(self, index_array):
+        """Get indices from an array of flatten indices (vectorized).
+
+        Returns an array of shape ``(len(index_array), nb_indices)``.
+
+        """
+        ranges, sizes = self._get_ranges_sizes()
+        nb_arrays = prod(sizes)
+        index_array = np.array(index_array, dtype=np.int64, ndmin=1)
+        index_array[index_array < 0] += nb_arrays
+        if index_array.size and (
+            index_array.min() < 0 or index_array.max() >= nb_arrays
+        ):
+            raise IndexError("index out of range")
+        positions = np.unravel_index(index_array, sizes)
+        indices = np.empty((index_array.size, len(ranges)), dtype=np.int64)
+        for idim, (range_, position) in enumerate(zip(ranges, positions)):
+            indices[:, idim] = range_.start + range_.step * position
+        return indices
+
+    def get_index_from_indices(self, *indices):
+        """Get the flatten index of an array from its indices."""
+        ranges, sizes = self._get_ranges_sizes()
+        if len(indices) != len(ranges):
+            raise ValueError("len(indices) != self.nb_indices")
+        index = 0
+        for range_, size, index_dim in zip(ranges, sizes, indices):
+            try:
+                position = range_.index(index_dim)
+            except ValueError as error:
+                raise ValueError(
+                    f"indices {indices} do not correspond to an array of the serie"
+                ) from error
+            index = index * size + position
+        return index
+
+    def get_index_array_from_indices(self, indices):
+        """Get flatten indices from an array of indices (vectorized).
+
+        Parameters
+        ----------
+
+        indices: array_like
+
+          Array of shape ``(nb_arrays, nb_indices)``.
+
+        """
+        ranges, sizes = self._get_ranges_sizes()
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.ndim != 2 or indices.shape[1] != len(ranges):
+            raise ValueError(
+                f"indices.shape = {indices.shape} incompatible with "
+                f"nb_indices = {len(ranges)}"
+            )
+        positions = []
+        for range_, size, column in zip(ranges, sizes, indices.T):
+            position, remainder = np.divmod(column - range_.start, range_.step)
+            if np.any(remainder) or np.any((position < 0) | (position >= size)):
+                raise ValueError(
+                    "Some indices do not correspond to arrays of the serie"
+                )
+            positions.append(position)
+        return np.ravel_multi_index(positions, sizes)
+
+    def get_array_from_index(self, index, roi=None, step=None):
+        """Get the ith array of the serie.
+
+        Parameters
+        ----------
+
+        index: int
+
+          Index of the array, for example 0 to get the first array.
+
+        roi, step :
+
+          Region of interest and step (see
+          :func:`SerieOfArraysFromFiles.get_array_from_name`).
+
+        """
+        indices = self.get_indices_from_index(index)
+        return self.get_array_from_indices(*indices, roi=roi, step=step)
+
+    def check_all_files_exist(self):
+        """Check that all files exist.
+
+        The check uses the index of the existing files (see :func:`refresh`).
+
+        """
+        return self._check_all_files_exist(self._slicing_tuples)
+
+    def check_all_arrays_exist(self):
+        """Check that all arrays exists."""
+        return self._check_all_arrays_exist(self._slicing_tuples)
+
+    def iter_indices(self):
+        """Iterator on the indices.
+
+        ``len(indices) == self.nb_indices``
+
+        """
+        ranges = [range(*s) for s in self._slicing_tuples]
+        for indices in itertools.product(*ranges):
+            yield indices
+
+    def __len__(self):
+        return prod(len(range(*s)) for s in self._slicing_tuples)
+
+    def iter_name_arrays(self):
+        """Iterator on the array names."""
+        for indices in self.iter_indices():
+            yield self.compute_name_from_indices(*indices)
+
+    __iter__ = iter_name_arrays
+
+    def iter_arrays(self, prefetch=0, nb_workers=1, roi=None, step=None):
+        """Iterator on the arrays of the serie.
+
+        Parameters
+        ----------
+
+        prefetch : int
+
+          Number of arrays read in advance by background threads while the
+          current array is processed (0 means no prefetching).
+
+        nb_workers : int
+
+          Number of threads used for prefetching.
+
+        roi, step :
+
+          Region of interest and step (see
+          :func:`SerieOfArraysFromFiles.get_array_from_name`).
+
+        """
+        if not prefetch:
+            names, get_array = self._get_names_loader_one_pass(
+                self.iter_name_arrays()
+            )
+            if roi is not None or step is not None:
+                get_array = partial(get_array, roi=roi, step=step)
+            for name in names:
+                yield get_array(name)
+            return
+
+        names, get_array = self._get_names_loader_one_pass(self.get_name_arrays())
+        if roi is not None or step is not None:
+            get_array = partial(get_array, roi=roi, step=step)
+        with ThreadPoolExecutor(nb_workers) as executor:
+            yield from _imap_ordered(executor, get_array, names, prefetch)
+
+    def _get_names_loader_one_pass(self, names):
+        """Names and function used to read the arrays in one pass
+
+        Subclasses can wrap them to give hints to the OS (see
+        :func:`SerieOfArraysFromFiles.set_io_hints`).
+
+        """
+        return names, self.get_array_from_name
+
+    async def aiter_arrays(self, concurrency=4, executor=None):
+        """Asynchronous iterator on the arrays of the serie.
+
+        The arrays are read in an executor so that the event loop is not
+        blocked, for example::
+
+          async for array in serie.aiter_arrays():
+              await queue.put(array)
+
+        Parameters
+        ----------
+
+        concurrency : int
+
+          Maximum number of arrays read concurrently (in advance).
+
+        executor : concurrent.futures.Executor, optional
+
+          Executor used to read the arrays. By default, a thread pool with
+          ``concurrency`` threads is created and shut down at the end of the
+          iteration.
+
+        """
+        names, get_array = self._get_names_loader_one_pass(self.get_name_arrays())
+        async for array in _aimap_ordered(
+            get_array, names, concurrency, executor
+        ):
+            yield array
+
+    def get_tuple_array_name_from_index(self, index: int = 0):
+        """Get an array and its name"""
+        indices = self.get_indices_from_index(index)
+        name = self.compute_name_from_indices(*indices)
+        return self.get_array_from_name(name), name
+
+    def get_slicing_tuples_all_files(self):
+        """Get nb_indices "slices" (to get all the arrays in the directory).
+
+        The "slices" are tuples of size 1 (``(start,)``), 2 (``(start, stop)``)
+        or 3 (``(start, stop, step)``).
+
+        """
+        return self._slicing_tuples_all_files
+
+    def get_slicing_tuples(self):
+        """Get nb_indices "slices" to get all the arrays of the serie.
+
+        The "slices" are tuples of size 1 (``(start,)``), 2 (``(start, stop)``)
+        or 3 (``(start, stop, step)``).
+        """
+        return self._slicing_tuples
+
+    def set_slicing_tuples(self, *slicing_tuples):
+        """Set the (nb_indices) "slicing tuples".
+
+        The "slicing tuples" are tuples of size 1 (``(start,)``), 2 (``(start, stop)``)
+        or 3 (``(start, stop, step)``).
+
+        """
+        if self._is_view:
+            raise ValueError("The slicing tuples of a view cannot be modified.")
+        self._slicing_tuples = self._normalize_slicing_tuples(*slicing_tuples)
+
+    def _copy_shallow(self):
+        """Copy sharing the index of the files, the open files and the cache"""
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        return new
+
+    def get_view(self, *slicing_tuples):
+        """Get an immutable view of the serie.
+
+        The view shares everything with the serie (index of the existing
+        files, open files, cache) except its slicing tuples, so that it is
+        cheap to create and can be used by other threads while the serie is
+        modified. The slicing tuples of a view cannot be modified.
+
+        Parameters
+        ----------
+
+        *slicing_tuples :
+
+          Slicing tuples of the view (by default, the slicing tuples of the
+          serie).
+
+        """
+        if slicing_tuples:
+            slicing_tuples = self._normalize_slicing_tuples(*slicing_tuples)
+        else:
+            slicing_tuples = self._slicing_tuples
+        view = self._copy_shallow()
+        view._slicing_tuples = tuple(tuple(s) for s in slicing_tuples)
+        view._is_view = True
+        return view
+
+    def is_view(self):
+        """True if the serie is an immutable view (see :func:`get_view`)."""
+        return self._is_view
+
+    def _normalize_slicing_tuples(self, *slicing_tuples):
+        """Compute complete "slicing tuples" (without None)"""
+        slicing_lists = list(slicing_tuples)
+        if len(slicing_lists) != self.nb_indices:
+            raise ValueError(
+                "len(slicing_tuples) != self.nb_indices\n"
+                "filename_given = {}\n".format(self.filename_given)
+                + f"path_dir = {self.path_dir}"
+            )
+
+        for i, islice in enumerate(slicing_lists):
+            if isinstance(islice, tuple):
+                slicing_lists[i] = list(islice)
+            if isinstance(islice, int):
+                slicing_lists[i] = [islice, islice + 1]
+            elif len(islice) == 1:
+                slicing_lists[i] = [islice[0], islice[0] + 1]
+
+        for i, islice in enumerate(slicing_lists):
+            for ii, index in enumerate(islice):
+                if index is None:
+                    slicing_lists[i][ii] = self._slicing_tuples_all_files[i][ii]
+
+        return [tuple(slicing) for slicing in slicing_lists]
+
+    def get_nb_arrays(self):
+        """Get the number of arrays in the serie."""
+        return len(self)
+
 
 class SerieOfArraysFromFiles(SerieOfArrays):
     """Serie of arrays saved in files (images, netcdf, etc.).
@@ -186,6 +1228,16 @@ class SerieOfArraysFromFiles(SerieOfArrays):
         Can also be a string of the form "0:2:6, 1" (in this case for two
         indexes).
 
+    index_file : bool or str
+
+        If True or a path, the index of the existing files is stored in a
+        file (by default a hidden ``.npz`` file in the directory of the serie)
+        so that the names of the files do not have to be parsed again. If the
+        modification time of the directory has not changed, the directory is
+        not even scanned. Otherwise, only the names of the new files are
+        parsed and the index file is updated. Give a file of the serie rather
+        than the directory as ``path`` to avoid a first scan of the directory.
+
     Attributes
     ----------
     path_dir : str
@@ -206,7 +1258,13 @@ class SerieOfArraysFromFiles(SerieOfArrays):
 
     """
 
-    def __init__(self, path, slicing=None):
+    # hints given to the OS (see set_io_hints)
+    _nb_files_ahead = 0
+    _drop_after_read = False
+    # index of the existing files shared with a copy (see _copy_shallow)
+    _index_files_shared = False
+
+    def __init__(self, path, slicing=None, index_file=False):
         super().__init__(path)
 
         self.base_name = "".join(
@@ -260,6 +1318,7 @@ class SerieOfArraysFromFiles(SerieOfArrays):
             self._index_separators.append("")
 
         self.nb_indices_name_file = len(self._index_types)
+        self._compile_name_patterns()
 
         str_glob_indices = ""
         for separator in self._index_separators:
@@ -270,69 +1329,290 @@ class SerieOfArraysFromFiles(SerieOfArrays):
         )
         if self.extension_file != "":
             str_glob += "." + self.extension_file
-        str_glob = os.path.join(self.path_dir, str_glob)
-        paths = glob(str_glob)
-        if not paths:
+        self._str_glob_file_names = str_glob
+
+        # series with the same glob can have different names (width of the
+        # indices, case of the letters)
+        self._format_names_index_file = self._format_name_file + "".join(
+            "" if capitalized is None else "A" if capitalized else "a"
+            for capitalized in self._index_capitalized
+        )
+        if index_file is True:
+            hash_format = hashlib.sha1(
+                self._format_names_index_file.encode()
+            ).hexdigest()[:8]
+            index_file = os.path.join(
+                self.path_dir,
+                ".fluiddyn_index_"
+                + re.sub(r"[^\w.-]", "_", str_glob)
+                + f"_{hash_format}.npz",
+            )
+        self._path_index_file = index_file or None
+
+        # for files containing more than one image
+        self._from_movies = self.extension_file in extensions_movies
+        if self._from_movies:
+            self.nb_indices = self.nb_indices_name_file + 1
+        else:
+            self.nb_indices = self.nb_indices_name_file
+
+        self._scan_directory()
+
+        self._slicing_input = slicing
+        if isinstance(slicing, str):
+            self.set_slicing_tuples_from_str(slicing)
+        elif slicing is None:
+            self._slicing_tuples = copy(self._slicing_tuples_all_files)
+        else:
+            self.set_slicing_tuples(*slicing)
+
+    def __repr__(self):
+        result = f"{type(self).__name__}('{self.path_dir}'"
+        if self._slicing_input is not None:
+            result += ", {self._slicing_input}"
+        return result + f", slicing_tuples={self._slicing_tuples})"
+
+    def _compile_name_patterns(self):
+        """Compile the regular expressions and the format string of the names"""
+        start = self.base_name + self._separator_base_index
+        parts_regex = [re.escape(start)]
+        parts_format = [_escape_braces(start)]
+        for idim, (index_type, index_len, separator) in enumerate(
+            zip(self._index_types, self._index_lens, self._index_separators)
+        ):
+            if index_type == "digit":
+                parts_regex.append(r"(\d+)")
+                parts_format.append("{%d:0%dd}" % (idim, index_len))
+            elif index_type == "alpha":
+                parts_regex.append(r"([^\W\d_]+)")
+                parts_format.append("{%d}" % idim)
+            else:
+                raise ValueError('The type should be "digit" or "alpha".')
+            parts_regex.append(re.escape(separator))
+            parts_format.append(_escape_braces(separator))
+
+        if self.extension_file != "":
+            parts_regex.append(re.escape("." + self.extension_file))
+            parts_format.append(_escape_braces("." + self.extension_file))
+
+        # optional internal index for files containing more than one array
+        regex = "".join(parts_regex) + r"(?:\[(\d+)\])?"
+        self._regex_name = re.compile(regex)
+        self._regex_names = re.compile("^" + regex + "$", re.MULTILINE)
+        self._format_name_file = "".join(parts_format)
+        self._has_alpha_index = "alpha" in self._index_types
+
+    def _scan_directory(self):
+        """Build the index of the existing files with one pass on the directory
+
+        The names of the files are parsed only once and their indices are
+        stored in a set so that checking the existence of a file is a O(1)
+        lookup. With an index file, the names already known are not parsed and
+        the directory is not scanned if it has not been modified.
+
+        """
+        path_index_file = self._path_index_file
+        names_in_dir = self._names_in_dir_scanned
+        # only useful for the first scan
+        self._names_in_dir_scanned = None
+
+        if path_index_file is None:
+            index_stored = None
+        else:
+            mtime_dir = os.stat(self.path_dir or os.curdir).st_mtime_ns
+            index_stored = self._load_index_file(path_index_file)
+
+        if index_stored is not None and index_stored[0] == mtime_dir:
+            _, names_stored, indices_files = index_stored
+            file_names = None
+        else:
+            if names_in_dir is None:
+                names_in_dir = _list_names_in_dir(self.path_dir)
+            file_names = self._filter_file_names(names_in_dir)
+            if index_stored is None:
+                indices_files = self.compute_indices_from_names(file_names)
+            else:
+                # only the new names are parsed
+                _, names_stored, indices_stored = index_stored
+                indices_known = dict(
+                    zip(
+                        _decode_names(names_stored),
+                        map(tuple, indices_stored.tolist()),
+                    )
+                )
+                indices_files = [
+                    indices_known.get(name)
+                    or tuple(self.compute_indices_from_name(name))
+                    for name in file_names
+                ]
+            indices_files = np.array(indices_files, dtype=np.int64).reshape(
+                len(file_names), self.nb_indices_name_file
+            )
+            file_names, indices_files = self._keep_files_of_serie(
+                file_names, indices_files
+            )
+            if path_index_file is not None:
+                self._save_index_file(
+                    path_index_file, mtime_dir, file_names, indices_files
+                )
+
+        if self._from_movies and not hasattr(self, "nb_arrays_in_one_file"):
+            if file_names is None:
+                file_names = _decode_names(names_stored)
+            path = os.path.join(self.path_dir, file_names[0])
+            self._nb_arrays_file = {}
+            self._nb_arrays_file[path] = self.nb_arrays_in_one_file = (
+                get_nb_arrays_in_file(path)
+            )
+            self._format_index = (
+                "[{"
+                + ":0{}d".format(int(ceil(log10(self.nb_arrays_in_one_file))))
+                + "}]"
+            )
+
+        self._indices_files = _IndicesExistingFiles(indices_files)
+        self._index_files_shared = False
+
+        self._slicing_tuples_all_files = [
+            (start, start + size, 1)
+            for start, size in zip(
+                self._indices_files._starts, self._indices_files._shape
+            )
+        ]
+        if self._from_movies:
+            self._slicing_tuples_all_files.append(
+                (0, self.nb_arrays_in_one_file, 1)
+            )
+
+    def _keep_files_of_serie(self, file_names, indices_files):
+        """Keep only the files whose names are computed from their indices
+
+        For example, ``im5.npy`` matches the pattern of the serie ``im05.npy``
+        but it is not a file of this serie.
+
+        """
+        names_computed = self._compute_names_files_from_indices(indices_files)
+        mask = [
+            name == name_computed
+            for name, name_computed in zip(file_names, names_computed)
+        ]
+        if all(mask):
+            return file_names, indices_files
+        file_names = [name for name, keep in zip(file_names, mask) if keep]
+        return file_names, indices_files[np.array(mask, dtype=bool)]
+
+    def _filter_file_names(self, names_in_dir):
+        """Get the sorted names of the files of the serie"""
+        str_glob = self._str_glob_file_names
+        file_names = fnmatch_filter(names_in_dir, str_glob)
+        if not str_glob.startswith("."):
+            # like glob, we ignore the hidden files
+            file_names = [name for name in file_names if name[0] != "."]
+
+        if not file_names:
             raise ValueError(
-                "There is no data in the provided path directory: " + str_glob
+                "There is no data in the provided path directory: "
+                + os.path.join(self.path_dir, str_glob)
             )
 
-        file_names = [os.path.basename(p) for p in paths]
         file_names.sort()
+        return file_names
+
+    def _load_index_file(self, path):
+        """Load an index file (returns None if it is not usable)"""
+        try:
+            with np.load(path) as data:
+                if (
+                    int(data["version"]) != _VERSION_INDEX_FILE
+                    or str(data["str_glob"]) != self._str_glob_file_names
+                    or str(data["format_names"]) != self._format_names_index_file
+                ):
+                    return None
+                mtime_dir = int(data["mtime_dir"])
+                names = data["names"]
+                indices_files = data["indices"]
+        except (OSError, KeyError, ValueError, BadZipFile):
+            return None
+        return mtime_dir, names, indices_files
+
+    def _save_index_file(self, path, mtime_dir, file_names, indices_files):
+        """Save an index file (only by the MPI process 0)
+
+        The file is overwritten in place so that the modification time of
+        the directory does not change (except the first time).
 
-        # for files containing more than one image
-        if self.extension_file in extensions_movies:
-            self._from_movies = True
-            self.nb_indices = self.nb_indices_name_file + 1
-            if len(file_names) == 0:
-                names = []
-            else:
-                self._nb_arrays_file = {}
-                self._nb_arrays_file[paths[0]] = self.nb_arrays_in_one_file = (
-                    get_nb_arrays_in_file(paths[0])
+        """
+        if mpi.rank != 0:
+            return
+        if time.time_ns() - mtime_dir < _RESOLUTION_MTIME_NS:
+            # the directory could be modified without change of its mtime
+            mtime_dir = -1
+        names = np.frombuffer("\n".join(file_names).encode(), dtype=np.uint8)
+        try:
+            with open(path, "wb") as file:
+                np.savez(
+                    file,
+                    version=_VERSION_INDEX_FILE,
+                    str_glob=self._str_glob_file_names,
+                    format_names=self._format_names_index_file,
+                    mtime_dir=mtime_dir,
+                    names=names,
+                    indices=indices_files,
                 )
+        except OSError:
+            # for example for read-only directories
+            pass
+
+    def _add_files_to_index(self, file_names):
+        """Add existing files to the index of the existing files
+
+        The index and the list of the slicing tuples of all files can be
+        shared with copies of the serie (see :func:`_copy_shallow`), so they
+        are not modified in place.
 
-                self._format_index = (
-                    "[{"
-                    + ":0{}d".format(int(ceil(log10(self.nb_arrays_in_one_file))))
-                    + "}]"
+        """
+        slicing_tuples_all_files = list(self._slicing_tuples_all_files)
+        for name in file_names:
+            indices = tuple(self.compute_indices_from_name(name))
+            if indices in self._indices_files:
+                continue
+            if (
+                self._compute_names_files_from_indices(np.array([indices]))[0]
+                != name
+            ):
+                # not a file of the serie (for example im5.npy for im05.npy)
+                continue
+            if self._index_files_shared:
+                self._indices_files = self._indices_files.copy()
+                self._index_files_shared = False
+            self._indices_files.add(indices)
+            for idim, index in enumerate(indices):
+                start, stop, step = slicing_tuples_all_files[idim]
+                slicing_tuples_all_files[idim] = (
+                    min(start, index),
+                    max(stop, index + 1),
+                    step,
                 )
-                str_internal_index = [
-                    self._format_index.format(i)
-                    for i in range(self.nb_arrays_in_one_file)
-                ]
-                names = []
-                for fname in file_names:
-                    names.extend(fname + s for s in str_internal_index)
-        else:
-            self._from_movies = False
-            names = file_names
-            self.nb_indices = self.nb_indices_name_file
+        self._slicing_tuples_all_files = slicing_tuples_all_files
 
-        indices_all_files = [
-            self.compute_indices_from_name(name) for name in names
-        ]
+    def _copy_shallow(self):
+        new = super()._copy_shallow()
+        # the index is copied before being modified (copy on write)
+        self._index_files_shared = new._index_files_shared = True
+        return new
 
-        self._slicing_tuples_all_files = []
-        tmp = list(zip(*indices_all_files))
-        for i_ind in range(self.nb_indices):
-            self._slicing_tuples_all_files.append(
-                tuple([min(tmp[i_ind]), max(tmp[i_ind]) + 1, 1])
-            )
+    def refresh(self):
+        """Rescan the directory and update the index of the existing files.
 
-        self._slicing_input = slicing
-        if isinstance(slicing, str):
-            self.set_slicing_tuples_from_str(slicing)
-        elif slicing is None:
-            self._slicing_tuples = copy(self._slicing_tuples_all_files)
-        else:
-            self.set_slicing_tuples(*slicing)
+        The index of the existing files is built when the serie is created and
+        is used for all existence checks. Call this method if files have been
+        added or removed since. The slicing tuples of the serie are not
+        modified. A view (see :func:`get_view`) cannot be refreshed.
 
-    def __repr__(self):
-        result = f"{type(self).__name__}('{self.path_dir}'"
-        if self._slicing_input is not None:
-            result += ", {self._slicing_input}"
-        return result + f", slicing_tuples={self._slicing_tuples})"
+        """
+        if self._is_view:
+            raise ValueError("A view cannot be refreshed.")
+        self._scan_directory()
 
     def get_separator_base_index(self):
         return self._separator_base_index
@@ -340,80 +1620,121 @@ class SerieOfArraysFromFiles(SerieOfArrays):
     def get_index_separators(self):
         return self._index_separators
 
-    def set_slicing_tuples_from_str(self, str_slices):
-        """Set slicing_tuples from a string."""
-        slices = compute_slices(str_slices)
-        slicing_tuples = []
-        for slice_ in slices:
-            if isinstance(slice_, slice):
-                step = slice_.step or 1
-                slicing_tuples.append((slice_.start, slice_.stop, step))
-            else:
-                slicing_tuples.append(slice_)
-        self.set_slicing_tuples(*slicing_tuples)
-
-    def get_arrays(self):
-        """Get the arrays on the serie."""
-        return tuple(a for a in self.iter_arrays())
-
     def get_name_files(self):
         """Get the names of the files of the serie."""
         return tuple(n for n in self.iter_name_files())
 
-    def get_name_arrays(self):
-        """Get the name of the arrays of the serie."""
-        return tuple(n for n in self.iter_name_arrays())
+    def _get_loader_for_processes(self):
+        """Picklable and lightweight function to get an array from its name"""
+        return partial(_imread_in_dir, self.path_dir)
 
-    def get_array_from_name(self, name):
-        """Get the array from its name."""
-        return imread(os.path.join(self.path_dir, name))
+    def set_io_hints(self, nb_files_ahead=0, drop_after_read=False):
+        """Set the hints given to the OS when the arrays are read in one pass.
 
-    def get_array_from_indices(self, *indices):
-        """Get an array from its indices.
+        The hints (``posix_fadvise``, only on POSIX systems) are used by the
+        iterators on the arrays (:func:`iter_arrays`, :func:`aiter_arrays`
+        and the iterators of :class:`SeriesOfArrays`). They are not used for
+        movie files (several arrays per file).
 
         Parameters
         ----------
 
-        *indices :
+        nb_files_ahead : int
 
-          As many indices as used in the serie. For example with names of the
-          form 'im100a.png', 2 indices are needed.
+          Number of files ahead of the consumer announced to the OS
+          (``POSIX_FADV_WILLNEED``) so that they are read in the background.
+
+        drop_after_read : bool
+
+          If True, the OS is told that the data of a file is no longer needed
+          after the array has been read (``POSIX_FADV_DONTNEED``), so that a
+          long scan does not fill the page cache. Not useful if the files are
+          read again (for example by overlapping series, except with
+          :func:`SeriesOfArrays.iter_arrays_read_once`).
 
         """
-        return self.get_array_from_name(self.compute_name_from_indices(*indices))
+        if nb_files_ahead < 0:
+            raise ValueError("nb_files_ahead < 0")
+        self._nb_files_ahead = nb_files_ahead
+        self._drop_after_read = drop_after_read
+
+    def _get_names_loader_one_pass(self, names):
+        get_array = self.get_array_from_name
+        if self._from_movies or not hasattr(os, "posix_fadvise"):
+            return names, get_array
+        if self._nb_files_ahead:
+            names = self._iter_names_willneed(names)
+        if self._drop_after_read:
+            get_array = self._get_array_from_name_dontneed
+        return names, get_array
+
+    def _iter_names_willneed(self, names):
+        """Yield the names and announce the next files to the OS"""
+        names = iter(names)
+        names_advised = deque()
+        while True:
+            for name in itertools.islice(
+                names, self._nb_files_ahead + 1 - len(names_advised)
+            ):
+                _fadvise(os.path.join(self.path_dir, name), "WILLNEED")
+                names_advised.append(name)
+            if not names_advised:
+                return
+            yield names_advised.popleft()
+
+    def _read_array_into(self, name, out, roi=None, step=None):
+        if self._cache is not None:
+            super()._read_array_into(name, out, roi, step)
+            return
+        imread(
+            os.path.join(self.path_dir, name),
+            roi=_compute_roi_slices(roi, step),
+            out=out,
+        )
 
-    def get_tuples_indices(self):
-        """Get a list of tuples containing the indices computed from `self._slicing_tuples`"""
-        return [
-            tuple(range(*start_stop_step))
-            for start_stop_step in self._slicing_tuples
-        ]
+    def _get_array_from_name_dontneed(self, name, roi=None, step=None):
+        """Get an array and tell the OS that the file is no longer needed"""
+        array = self.get_array_from_name(name, roi=roi, step=step)
+        _fadvise(os.path.join(self.path_dir, name), "DONTNEED")
+        return array
 
-    def get_indices_from_index(self, index):
-        """Get indices from a flatten index"""
-        if self.nb_indices_name_file == 1:
-            return tuple([range(*self._slicing_tuples[0])[index]])
-        elif self.nb_indices_name_file == 2:
-            n0, n1 = [len(range(*_slice)) for _slice in self._slicing_tuples]
-            i0 = range(*self._slicing_tuples[0])[index // n1]
-            i1 = range(*self._slicing_tuples[1])[index % n1]
-            return tuple([i0, i1])
-        # inefficient
-        return tuple(self.iter_indices())[index]
-
-    def get_array_from_index(self, index):
-        """Get the ith array of the serie.
+    def get_array_from_name(self, name, roi=None, step=None):
+        """Get the array from its name.
 
         Parameters
         ----------
 
-        index: int
+        name : str
 
-          Index of the array, for example 0 to get the first array.
+        roi : slice or tuple of slices, optional
+
+          Region of interest, for example ``(slice(100, 200), slice(50,
+          None))``. Only positive steps are supported.
+
+        step : int or tuple of int, optional
+
+          Step used to decimate the array (an int is used for the 2 first
+          dimensions).
+
+        Notes
+        -----
+
+        For uncompressed formats (``.npy`` and uncompressed TIFF files), only
+        the region is read. For other formats, the array is read and the
+        region is copied.
 
         """
-        indices = self.get_indices_from_index(index)
-        return self.get_array_from_indices(*indices)
+        path = os.path.join(self.path_dir, name)
+        roi = _compute_roi_slices(roi, step)
+        if roi is None:
+            if self._cache is None:
+                return imread(path)
+            return self._cache.get_or_load(path, imread)
+        if self._cache is None:
+            return imread(path, roi=roi)
+        return self._cache.get_or_load(
+            (path, _hashable_roi(roi)), lambda key: imread(path, roi=roi)
+        )
 
     def get_path_all_files(self):
         """Get all paths found from path_dir and base_name."""
@@ -450,25 +1771,42 @@ class SerieOfArraysFromFiles(SerieOfArrays):
             for name in self.get_name_arrays()
         )
 
-    def check_all_files_exist(self):
-        """Check that all files exist."""
-        name_files = self.get_name_files()
-        return all([self.isfile(name) for name in name_files])
+    def _check_all_files_exist(self, slicing_tuples):
+        """Check that all files corresponding to slicing tuples exist."""
+        if self._from_movies:
+            slicing_tuples = slicing_tuples[:-1]
+        ranges = [range(*s) for s in slicing_tuples]
+        indices_files = self._indices_files
+        return all(
+            indices in indices_files for indices in itertools.product(*ranges)
+        )
 
-    def check_all_arrays_exist(self):
-        """Check that all arrays exists."""
-        if not self._from_movies:
-            return self.check_all_files_exist()
+    def _check_all_arrays_exist(self, slicing_tuples):
+        """Check that all arrays corresponding to slicing tuples exist.
+
+        Contrary to :func:`check_all_arrays_exist`, the slicing tuples of the
+        serie are not used and the serie is not modified.
 
-        if not self.check_all_files_exist():
+        """
+        if not self._check_all_files_exist(slicing_tuples):
             return False
 
-        for indices in self.iter_indices():
-            internal_index = indices[-1]
-            if internal_index >= self.nb_arrays_in_one_file:
-                return False
+        if not self._from_movies:
+            return True
 
-        for path in self.get_path_files():
+        range_internal = range(*slicing_tuples[-1])
+        if (
+            range_internal
+            and max(range_internal[0], range_internal[-1])
+            >= self.nb_arrays_in_one_file
+        ):
+            return False
+
+        ranges = [range(*s) for s in slicing_tuples[:-1]]
+        for indices in itertools.product(*ranges):
+            path = os.path.join(
+                self.path_dir, self._compute_name_file_from_indices(*indices, 0)
+            )
             if path not in self._nb_arrays_file:
                 self._nb_arrays_file[path] = get_nb_arrays_in_file(path)
 
@@ -480,18 +1818,15 @@ class SerieOfArraysFromFiles(SerieOfArrays):
 
         return True
 
-    def iter_indices(self):
-        """Iterator on the indices.
-
-        ``len(indices) == self.nb_indices``
-
-        """
-        ranges = [range(*s) for s in self._slicing_tuples]
-        for indices in itertools.product(*ranges):
-            yield indices
-
-    def __len__(self):
-        return sum(1 for _ in self.iter_indices())
+    def _is_below_existing_files(self, slicing_tuples):
+        """Check if an index is smaller than the indices of all files."""
+        for start_all, slicing in zip(
+            self._slicing_tuples_all_files, slicing_tuples
+        ):
+            indices = range(*slicing)
+            if indices and min(indices[0], indices[-1]) < start_all[0]:
+                return True
+        return False
 
     def iter_name_files(self):
         """Iterator on the file names."""
@@ -505,28 +1840,65 @@ class SerieOfArraysFromFiles(SerieOfArrays):
             else:
                 yield name
 
-    def iter_name_arrays(self):
-        """Iterator on the array names."""
-        for indices in self.iter_indices():
-            yield self.compute_name_from_indices(*indices)
-
-    __iter__ = iter_name_arrays
-
     def iter_path_files(self):
         """Iterator on the file paths."""
         for name in self.iter_name_files():
             yield os.path.join(self.path_dir, name)
 
-    def iter_arrays(self):
-        """Iterator on the arrays of the serie."""
-        for name in self.iter_name_arrays():
-            yield self.get_array_from_name(name)
+    def iter_name_arrays_follow(
+        self, timeout=10.0, poll_period=0.5, stable_time=1.0
+    ):
+        """Iterator on the array names for live acquisitions (follow mode).
 
-    def get_tuple_array_name_from_index(self, index: int = 0):
-        """Get an array and its name"""
-        indices = self.get_indices_from_index(index)
-        name = self.compute_name_from_indices(*indices)
-        return self.get_array_from_name(name), name
+        The first index is not bounded: the iteration starts at the first
+        array of the serie and continues with the new files written in the
+        directory (the other indices are given by the slicing tuples). A name
+        is yielded as soon as the file containing the array is complete (see
+        below).
+
+        Parameters
+        ----------
+
+        timeout : float
+
+          The iteration stops when no new complete file has been found during
+          ``timeout`` seconds.
+
+        poll_period : float
+
+          Maximum time (in s) between two checks of the files. On Linux,
+          inotify is used to be notified as soon as a file is closed after
+          writing.
+
+        stable_time : float
+
+          A file which has not been closed after writing (as detected by
+          inotify) is considered as complete when it has not been modified
+          for ``stable_time`` seconds.
+
+        """
+        start, _, *step = self._slicing_tuples[0]
+        step = step[0] if step else 1
+        ranges_other = [range(*s) for s in self._slicing_tuples[1:]]
+        with _FilesWatcher(self, poll_period, stable_time) as watcher:
+            for index0 in itertools.count(start, step):
+                for indices_other in itertools.product(*ranges_other):
+                    indices = (index0,) + indices_other
+                    name_file = self._compute_name_file_from_indices(*indices)
+                    if not watcher.wait_for_files([name_file], timeout):
+                        return
+                    yield self.compute_name_from_indices(*indices)
+
+    def iter_arrays_follow(self, timeout=10.0, poll_period=0.5, stable_time=1.0):
+        """Iterator on the arrays for live acquisitions (follow mode).
+
+        See :func:`iter_name_arrays_follow` for the parameters.
+
+        """
+        for name in self.iter_name_arrays_follow(
+            timeout, poll_period, stable_time
+        ):
+            yield self.get_array_from_name(name)
 
     def get_str_for_name_from_idim_idx(self, idim, idx):
         """Compute the str corresponding to the index ``idx`` for the dimension ``idim``"""
@@ -586,17 +1958,91 @@ class SerieOfArraysFromFiles(SerieOfArrays):
 
         indices: iterable of int.
         """
-        name = (
-            self.base_name
-            + self._separator_base_index
-            + self.compute_str_indices_from_indices(*indices)
-        )
-        if self.extension_file != "":
-            name += "." + self.extension_file
+        indices_file = indices[:-1] if self._from_movies else indices
+        if len(indices_file) != self.nb_indices_name_file:
+            raise ValueError("nb_indices != self.nb_indices")
+
+        if self._has_alpha_index:
+            indices_file = [
+                (
+                    self.get_str_for_name_from_idim_idx(idim, index)
+                    if index_type == "alpha"
+                    else index
+                )
+                for idim, (index_type, index) in enumerate(
+                    zip(self._index_types, indices_file)
+                )
+            ]
 
+        name = self._format_name_file.format(*indices_file)
         if self._from_movies:
             name += self._format_index.format(indices[-1])
+        return name
+
+    def compute_names_from_indices(self, indices):
+        """Compute names from an array of indices.
+
+        Parameters
+        ----------
+
+        indices: array_like
+
+          Array of shape ``(nb_names, nb_indices)`` (can be 1D if
+          ``nb_indices == 1``).
+
+        Returns
+        -------
+
+        names: list of str
+
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.ndim == 1 and self.nb_indices == 1:
+            indices = indices[:, np.newaxis]
+        if indices.ndim != 2 or indices.shape[1] != self.nb_indices:
+            raise ValueError(
+                f"indices.shape = {indices.shape} incompatible with "
+                f"nb_indices = {self.nb_indices}"
+            )
+
+        names = self._compute_names_files_from_indices(indices)
+        if self._from_movies:
+            format_index = self._format_index.format
+            names = [
+                name + format_index(index)
+                for name, index in zip(names, indices[:, -1].tolist())
+            ]
+        return names
+
+    def _compute_names_files_from_indices(self, indices):
+        """Compute names of files from an array of indices (2D)
+
+        The internal indices (if any) are not used.
+
+        """
+        columns = []
+        for idim in range(self.nb_indices_name_file):
+            column = indices[:, idim]
+            if self._index_types[idim] == "alpha":
+                values, inverse = np.unique(column, return_inverse=True)
+                strings = [
+                    self.get_str_for_name_from_idim_idx(idim, value)
+                    for value in values.tolist()
+                ]
+                columns.append([strings[i] for i in inverse.ravel().tolist()])
+            else:
+                columns.append(column.tolist())
 
+        if not columns:
+            return [self._format_name_file] * len(indices)
+        format_name = self._format_name_file.format
+        return [format_name(*row) for row in zip(*columns)]
+
+    def _compute_name_file_from_indices(self, *indices):
+        """Compute the name of the file containing an array"""
+        name = self.compute_name_from_indices(*indices)
+        if self._from_movies:
+            name = name.rsplit("[", 1)[0]
         return name
 
     def compute_indices_from_name(self, name):
@@ -608,49 +2054,79 @@ class SerieOfArraysFromFiles(SerieOfArrays):
         name: str
            Name of the array.
         """
-        str_indices = str(name[len(self.base_name) :])
+        match = self._regex_name.fullmatch(name)
+        if match is None:
+            raise ValueError(
+                f"The name {name} does not correspond to the pattern of the "
+                f"names of the serie ({self._regex_name.pattern})."
+            )
+        *strings, internal_index = match.groups()
+        indices = [
+            int(string) if index_type == "digit" else _number_from_letters(string)
+            for index_type, string in zip(self._index_types, strings)
+        ]
+        if internal_index is not None:
+            indices.append(int(internal_index))
+        return indices
 
-        if self._separator_base_index != "":
-            str_indices = str_indices[1:]
+    def compute_indices_from_names(self, names):
+        """Compute the indices of many names.
 
-        if str_indices.endswith("]"):
-            str_indices, internal_index = str_indices.split("[")
-            internal_index = int(internal_index[:-1])
-        else:
-            internal_index = None
+        Parameters
+        ----------
 
-        if self.extension_file != "":
-            str_indices = str_indices[: -(len(self.extension_file) + 1)]
+        names: iterable of str
 
-        remains = str_indices
-        indices = []
-        for i_ind in range(self.nb_indices_name_file):
-            if self._index_types[i_ind] == "digit":
-                test_type = str.isdigit
-            elif self._index_types[i_ind] == "alpha":
-                test_type = str.isalpha
-            else:
-                raise ValueError('The type should be "digit" or "alpha".')
+          Names of files (without internal index) or names of arrays.
 
-            index = "".join(itertools.takewhile(test_type, remains))
-            remains = remains[len(index) :]
-            if self._index_separators[i_ind] != "":
-                remains = remains[1:]
-
-            if self._index_types[i_ind] == "digit":
-                index = int(index)
-            elif self._index_types[i_ind] == "alpha":
-                index = index.lower()
-                if len(index) == 1:
-                    index = _number_from_letter(index)
-                else:
-                    index = _number_from_letters(index)
-            indices.append(index)
+        Returns
+        -------
 
-        if internal_index is not None:
-            indices.append(internal_index)
+        indices: numpy.ndarray
+
+          Array of shape ``(nb_names, nb_indices)`` (for names of files
+          containing more than one array, the internal index is not included).
+
+        """
+        names = list(names)
+        if not names:
+            return np.empty((0, self.nb_indices_name_file), dtype=np.int64)
 
-        assert len(remains) == 0
+        matches = self._regex_names.findall("\n".join(names))
+        if len(matches) != len(names):
+            for name in names:
+                self.compute_indices_from_name(name)
+            raise ValueError("Some names do not correspond to the serie.")
+
+        if self.nb_indices_name_file == 0:
+            columns = [matches]
+        else:
+            columns = [
+                list(map(itemgetter(idim), matches))
+                for idim in range(self.nb_indices_name_file + 1)
+            ]
+
+        internal_indices = columns.pop()
+        with_internal_index = internal_indices[0] != ""
+        if with_internal_index:
+            columns.append(internal_indices)
+        elif any(internal_indices):
+            raise ValueError("Names of files mixed with names of arrays.")
+
+        indices = np.empty((len(names), len(columns)), dtype=np.int64)
+        for idim, column in enumerate(columns):
+            if idim < self.nb_indices_name_file and (
+                self._index_types[idim] == "alpha"
+            ):
+                numbers = {
+                    string: _number_from_letters(string) for string in set(column)
+                }
+                converter = numbers.__getitem__
+            else:
+                converter = int
+            indices[:, idim] = np.fromiter(
+                map(converter, column), dtype=np.int64, count=len(names)
+            )
         return indices
 
     def isfile(self, path):
@@ -659,108 +2135,509 @@ class SerieOfArraysFromFiles(SerieOfArrays):
             path = os.path.join(self.path_dir, path)
         return os.path.exists(path)
 
-    def get_slicing_tuples_all_files(self):
-        """Get nb_indices "slices" (to get all the arrays in the directory).
+    def get_nb_files(self):
+        """Get the number of files of the serie."""
+        return len(self.get_name_files())
+
+
+def add_depreciated_function(cls, name):
+    """Add a depreciated function like get_index_slices"""
+    assert "index_slices" in name
+    new_name = name.replace("index_slices", "slicing_tuples")
+    message = f"Call to deprecated function {name}. Use {new_name} instead."
+    new_func = getattr(cls, new_name)
+
+    @wraps(new_func)
+    def _new_func(*args, **kwargs):
+        warnings.warn(message, category=DeprecationWarning, stacklevel=2)
+        return new_func(*args, **kwargs)
+
+    setattr(cls, name, _new_func)
+
+
+for name in [
+    "get_index_slices",
+    "get_index_slices_all_files",
+    "set_index_slices",
+    "set_index_slices_from_str",
+]:
+    add_depreciated_function(SerieOfArraysFromFiles, name)
+
+
+def _compute_index_from_name_hdf5(name):
+    """Compute the index from a name of the form ``f"{key}[{index}]"``"""
+    key, sep, index = name.rpartition("[")
+    if not sep or not index.endswith("]"):
+        raise ValueError(f"Bad name of array: {name}")
+    return int(index[:-1])
+
+
+# files opened by the workers (see SerieOfArraysFromHDF5._get_loader_for_processes)
+_h5_files_workers = {}
+
+
+def _read_array_hdf5(path_file, key, axis, name):
+    """Read an array of a dataset in a file kept open (used in workers)"""
+    pid = os.getpid()
+    try:
+        pid_file, file = _h5_files_workers[path_file]
+    except KeyError:
+        pid_file = None
+    if pid_file != pid:
+        file = h5py.File(path_file, "r")
+        _h5_files_workers[path_file] = (pid, file)
+    index = _compute_index_from_name_hdf5(name)
+    return file[key][(slice(None),) * axis + (index,)]
+
+
+class SerieOfArraysFromHDF5(SerieOfArrays):
+    """Serie of arrays stored in one dataset of a HDF5 (or NetCDF4) file.
+
+    Each array is a slab of the dataset (for example an image of a stack of
+    images of shape ``(nb_images, ny, nx)``). The file is kept open and
+    contiguous arrays are read with one hyperslab selection. The serie has
+    one index (the index along the axis of the serie) and the name of the
+    array ``index`` is ``f"{key}[{index}]"``.
+
+    Parameters
+    ----------
+
+    path : str
+        The path of the file.
+
+    key : str, optional
+        The name of the dataset (or of the NetCDF variable). Can be omitted
+        if the file contains only one dataset.
+
+    slicing : None or iterable of iterables or str
+
+        Slicing tuple (start, stop, step) for the index of the serie. Can
+        also be a string of the form "0:10:2".
+
+    axis : int or str
+
+        Axis of the dataset corresponding to the index of the serie. Can be
+        the name of a dimension (for NetCDF4 files, for example "time").
+
+    """
+
+    def __init__(self, path, key=None, slicing=None, axis=0):
+        super().__init__(path)
+        self.path_file = os.path.join(self.path_dir, self.filename_given)
+        self._pid = os.getpid()
+        self._file = h5py.File(self.path_file, "r")
+
+        if key is None:
+            keys = []
+
+            def append_key(name, obj):
+                if isinstance(obj, h5py.Dataset) and obj.ndim > 1:
+                    keys.append(name)
+
+            self._file.visititems(append_key)
+            if len(keys) != 1:
+                raise ValueError(
+                    f"key has to be given (datasets in {self.path_file}: {keys})"
+                )
+            key = keys[0]
+        self.key = key
+        dataset = self._dataset = self._file[key]
+
+        if isinstance(axis, str):
+            axis = self._get_axis_from_dim_name(axis)
+        if not 0 <= axis < dataset.ndim:
+            raise ValueError(f"Bad axis {axis} for dataset {dataset}")
+        self.axis = axis
+
+        self.nb_indices = 1
+        self.shape_array = dataset.shape[:axis] + dataset.shape[axis + 1 :]
+        self.dtype = dataset.dtype
+        self._slicing_tuples_all_files = [(0, dataset.shape[axis])]
+
+        self._slicing_input = slicing
+        if isinstance(slicing, str):
+            self.set_slicing_tuples_from_str(slicing)
+        elif slicing is None:
+            self._slicing_tuples = copy(self._slicing_tuples_all_files)
+        else:
+            self.set_slicing_tuples(*slicing)
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}('{self.path_file}', key='{self.key}', "
+            f"slicing_tuples={self._slicing_tuples})"
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_file"] = state["_dataset"] = None
+        return state
+
+    def _get_axis_from_dim_name(self, name_dim):
+        """Get the axis from the name of a dimension (dimension scale)"""
+        for axis, dim in enumerate(self._dataset.dims):
+            names = [dim.label] + [
+                scale.name.rsplit("/", 1)[-1] for scale in dim.values()
+            ]
+            if name_dim in names:
+                return axis
+        raise ValueError(f"No dimension {name_dim} for dataset {self._dataset}")
+
+    def _get_dataset(self):
+        """Get the dataset (the file is reopened after a fork or a copy)"""
+        if not self._file or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._file = h5py.File(self.path_file, "r")
+            self._dataset = self._file[self.key]
+        return self._dataset
+
+    def close(self):
+        """Close the file (it is reopened if needed)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = self._dataset = None
+
+    def _read(self, selection, roi=None):
+        """Read a selection along the axis of the serie (hyperslab)"""
+        dataset = self._get_dataset()
+        if roi is None:
+            return dataset[(slice(None),) * self.axis + (selection,)]
+        selections = [slice(None)] * dataset.ndim
+        selections[self.axis] = selection
+        dims_array = [dim for dim in range(dataset.ndim) if dim != self.axis]
+        if len(roi) > len(dims_array):
+            raise ValueError(f"roi {roi} incompatible with {self.shape_array = }")
+        for dim, slice_ in zip(dims_array, roi):
+            selections[dim] = slice_
+        return dataset[tuple(selections)]
+
+    def _get_shape_array(self, roi=None):
+        """Shape of the arrays (with a region of interest)"""
+        if roi is None:
+            return self.shape_array
+        return tuple(
+            len(range(*slice_.indices(size)))
+            for slice_, size in zip(
+                roi + (slice(None),) * (len(self.shape_array) - len(roi)),
+                self.shape_array,
+            )
+        )
+
+    def compute_name_from_indices(self, index):
+        """Compute the name of an array from its index."""
+        return f"{self.key}[{index}]"
+
+    def compute_indices_from_name(self, name):
+        """Compute the indices (tuple of one int) from the name of an array."""
+        return (_compute_index_from_name_hdf5(name),)
 
-        The "slices" are tuples of size 1 (``(start,)``), 2 (``(start, stop)``)
-        or 3 (``(start, stop, step)``).
+    def _get_loader_for_processes(self):
+        """Picklable and lightweight function to get an array from its name"""
+        return partial(_read_array_hdf5, self.path_file, self.key, self.axis)
 
-        """
-        return self._slicing_tuples_all_files
+    def get_array_from_name(self, name, roi=None, step=None):
+        """Get the array from its name.
 
-    def get_slicing_tuples(self):
-        """Get nb_indices "slices" to get all the arrays of the serie.
+        ``roi`` and ``step`` (see
+        :func:`SerieOfArraysFromFiles.get_array_from_name`) are used in the
+        hyperslab selection so that only the region is read.
 
-        The "slices" are tuples of size 1 (``(start,)``), 2 (``(start, stop)``)
-        or 3 (``(start, stop, step)``).
         """
-        return self._slicing_tuples
+        index = _compute_index_from_name_hdf5(name)
+        roi = _compute_roi_slices(roi, step)
+        if self._cache is None:
+            return self._read(index, roi)
+        key = (self.path_file, name)
+        if roi is not None:
+            key += (_hashable_roi(roi),)
+        return self._cache.get_or_load(key, lambda key: self._read(index, roi))
+
+    def get_array_from_indices(self, index, roi=None, step=None):
+        """Get an array from its index."""
+        if self._cache is None:
+            return self._read(index, _compute_roi_slices(roi, step))
+        return self.get_array_from_name(
+            self.compute_name_from_indices(index), roi=roi, step=step
+        )
 
-    def set_slicing_tuples(self, *slicing_tuples):
-        """Set the (nb_indices) "slicing tuples".
+    def _iter_slices_read(self):
+        """Iterator on the slices read with one hyperslab selection"""
+        range_ = range(*self._slicing_tuples[0])
+        if not range_:
+            return
+        if range_.step < 0:
+            # no hyperslab selections with negative steps
+            for index in range_:
+                yield index
+            return
+        dataset = self._get_dataset()
+        nbytes_array = max(dataset.dtype.itemsize * prod(self.shape_array), 1)
+        nb_per_read = max(1, 2**26 // nbytes_array)
+        if dataset.chunks is not None:
+            chunk = dataset.chunks[self.axis]
+            nb_per_read = max(chunk, nb_per_read // chunk * chunk)
+        for sub_range in (
+            range_[i : i + nb_per_read]
+            for i in range(0, len(range_), nb_per_read)
+        ):
+            yield slice(sub_range.start, sub_range.stop, sub_range.step)
 
-        The "slicing tuples" are tuples of size 1 (``(start,)``), 2 (``(start, stop)``)
-        or 3 (``(start, stop, step)``).
+    def iter_arrays(self, prefetch=0, nb_workers=1, roi=None, step=None):
+        """Iterator on the arrays of the serie.
+
+        Without cache and prefetching, contiguous arrays are read with one
+        hyperslab selection (in blocks of approximately 64 MiB).
 
         """
-        slicing_lists = list(slicing_tuples)
-        if len(slicing_lists) != self.nb_indices:
-            raise ValueError(
-                "len(slicing_tuples) != self.nb_indices\n"
-                "filename_given = {}\n".format(self.filename_given)
-                + f"path_dir = {self.path_dir}"
-            )
+        if prefetch or self._cache is not None:
+            yield from super().iter_arrays(prefetch, nb_workers, roi, step)
+            return
+
+        roi = _compute_roi_slices(roi, step)
+        for selection in self._iter_slices_read():
+            if isinstance(selection, int):
+                yield self._read(selection, roi)
+                continue
+            arrays = self._read(selection, roi)
+            for array in np.moveaxis(arrays, self.axis, 0):
+                yield array
+
+    def get_stacked_array(
+        self,
+        out=None,
+        dtype=None,
+        memmap_path=None,
+        nb_workers=1,
+        roi=None,
+        step=None,
+    ):
+        """Get the arrays of the serie stacked in one array.
 
-        for i, islice in enumerate(slicing_lists):
-            if isinstance(islice, tuple):
-                slicing_lists[i] = list(islice)
-            if isinstance(islice, int):
-                slicing_lists[i] = [islice, islice + 1]
-            elif len(islice) == 1:
-                slicing_lists[i] = [islice[0], islice[0] + 1]
+        The arrays are read with hyperslab selections (see
+        :func:`SerieOfArrays.get_stacked_array` for the parameters).
 
-        for i, islice in enumerate(slicing_lists):
-            for ii, index in enumerate(islice):
-                if index is None:
-                    slicing_lists[i][ii] = self._slicing_tuples_all_files[i][ii]
+        """
+        roi = _compute_roi_slices(roi, step)
+        shape = (len(self),) + self._get_shape_array(roi)
+        if shape[0] == 0:
+            raise ValueError("The serie does not contain any array.")
+        if out is None:
+            if dtype is None:
+                dtype = self.dtype
+            if memmap_path is None:
+                out = np.empty(shape, dtype=dtype)
+            else:
+                out = np.memmap(memmap_path, dtype=dtype, mode="w+", shape=shape)
+        elif out.shape != shape:
+            raise ValueError(f"out.shape = {out.shape} != {shape}")
+
+        index = 0
+        for selection in self._iter_slices_read():
+            arrays = self._read(selection, roi)
+            if isinstance(selection, int):
+                out[index] = arrays
+                index += 1
+            else:
+                arrays = np.moveaxis(arrays, self.axis, 0)
+                out[index : index + len(arrays)] = arrays
+                index += len(arrays)
 
-        self._slicing_tuples = [tuple(slicing) for slicing in slicing_lists]
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out
 
-    def get_nb_arrays(self):
-        """Get the number of arrays in the serie."""
-        return len([i for i in self.iter_indices()])
+    def get_name_files(self):
+        """Get the names of the files of the serie (only one file)."""
+        return (self.filename_given,)
+
+    def iter_name_files(self):
+        """Iterator on the file names (only one file)."""
+        yield self.filename_given
+
+    def get_path_files(self):
+        """Get the paths of the files of the serie (only one file)."""
+        return (self.path_file,)
 
     def get_nb_files(self):
-        """Get the number of files of the serie."""
-        return len(self.get_name_files())
+        """Get the number of files of the serie (1)."""
+        return 1
 
+    def refresh(self):
+        """Reopen the file and update the number of arrays in the dataset.
 
-def add_depreciated_function(cls, name):
-    """Add a depreciated function like get_index_slices"""
-    assert "index_slices" in name
-    new_name = name.replace("index_slices", "slicing_tuples")
-    message = f"Call to deprecated function {name}. Use {new_name} instead."
-    new_func = getattr(cls, new_name)
+        The slicing tuples of the serie are not modified. A view (see
+        :func:`get_view`) cannot be refreshed.
 
-    @wraps(new_func)
-    def _new_func(*args, **kwargs):
-        warnings.warn(message, category=DeprecationWarning, stacklevel=2)
-        return new_func(*args, **kwargs)
+        """
+        if self._is_view:
+            raise ValueError("A view cannot be refreshed.")
+        self.close()
+        dataset = self._get_dataset()
+        self._slicing_tuples_all_files = [(0, dataset.shape[self.axis])]
 
-    setattr(cls, name, _new_func)
+    def _check_all_files_exist(self, slicing_tuples):
+        return True
 
+    def _check_all_arrays_exist(self, slicing_tuples):
+        range_ = range(*slicing_tuples[0])
+        if not range_:
+            return True
+        nb_arrays = self._slicing_tuples_all_files[0][1]
+        return (
+            0 <= min(range_[0], range_[-1])
+            and max(range_[0], range_[-1]) < nb_arrays
+        )
 
-for name in [
-    "get_index_slices",
-    "get_index_slices_all_files",
-    "set_index_slices",
-    "set_index_slices_from_str",
-]:
-    add_depreciated_function(SerieOfArraysFromFiles, name)
+    def _is_below_existing_files(self, slicing_tuples):
+        range_ = range(*slicing_tuples[0])
+        return bool(range_) and min(range_[0], range_[-1]) < 0
+
+
+def _parse_affine(node):
+    """Parse an ast node of an expression of the form ``a*i + b``
+
+    Returns the tuple ``(a, b)`` of integers or None for other expressions.
+
+    """
+    if isinstance(node, ast.Expression):
+        return _parse_affine(node.body)
+    if isinstance(node, ast.Constant):
+        if type(node.value) is int:
+            return 0, node.value
+        return None
+    if isinstance(node, ast.Name):
+        if node.id == "i":
+            return 1, 0
+        return None
+    if isinstance(node, ast.UnaryOp) and isinstance(
+        node.op, (ast.UAdd, ast.USub)
+    ):
+        operand = _parse_affine(node.operand)
+        if operand is None:
+            return None
+        if isinstance(node.op, ast.USub):
+            return -operand[0], -operand[1]
+        return operand
+    if isinstance(node, ast.BinOp) and isinstance(
+        node.op, (ast.Add, ast.Sub, ast.Mult)
+    ):
+        left = _parse_affine(node.left)
+        right = _parse_affine(node.right)
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, ast.Add):
+            return left[0] + right[0], left[1] + right[1]
+        if isinstance(node.op, ast.Sub):
+            return left[0] - right[0], left[1] - right[1]
+        if left[0] and right[0]:
+            # i*i is not affine
+            return None
+        return (
+            left[0] * right[1] + right[0] * left[1],
+            left[1] * right[1],
+        )
+    return None
 
 
 class SlicingTuplesFromIndexSerie:
+    """Slicing tuples of a serie computed from a string expression
+
+    The string (for example ``"i:i+2, 1:3"``) is parsed once at
+    initialization. The bounds of the form ``a*i + b`` (with integers ``a``
+    and ``b``) are stored as pairs of integers and the other expressions are
+    evaluated with ``simple_eval``.
+
+    """
+
     def __init__(self, str_slices, serie):
         self.str_ranges = [s.strip() for s in str_slices.split(",")]
         self.starts = [s[0] for s in serie.get_slicing_tuples()]
 
+        # for each dimension, list of bounds: a tuple (a, b) for a*i + b,
+        # None for an open stop or a string for other expressions
+        self._bounds = []
+        for idim, str_range in enumerate(self.str_ranges):
+            str_bounds = str_range.split(":")
+            if len(str_bounds) > 3:
+                raise ValueError(f"Bad slicing expression: {str_range!r}")
+            bounds = []
+            self._bounds.append(bounds)
+            for ii, str_bound in enumerate(str_bounds):
+                str_bound = str_bound.strip()
+                if str_bound == "":
+                    if ii == 0:
+                        bounds.append((0, self.starts[idim]))
+                    elif ii == 1:
+                        bounds.append(None)
+                    continue
+                try:
+                    tree = ast.parse(str_bound, mode="eval")
+                except SyntaxError as error:
+                    raise ValueError(
+                        f"Bad slicing expression: {str_bound!r}"
+                    ) from error
+                affine = _parse_affine(tree)
+                bounds.append(str_bound if affine is None else affine)
+
+    @property
+    def is_affine(self):
+        """True if all bounds are of the form ``a*i + b``"""
+        return not any(
+            isinstance(bound, str) for bounds in self._bounds for bound in bounds
+        )
+
     def __call__(self, index):
         slicing_tuples = []
-        for idim, str_range in enumerate(self.str_ranges):
+        for bounds in self._bounds:
             indslice = []
             slicing_tuples.append(indslice)
-            for ii, s in enumerate(str_range.split(":")):
-                if s.strip() == "":
-                    if ii == 0:
-                        indslice.append(self.starts[idim])
-                    elif ii == 1:
-                        indslice.append(None)
-                    elif ii > 2:
-                        raise ValueError
+            for bound in bounds:
+                if bound is None:
+                    indslice.append(None)
+                elif isinstance(bound, str):
+                    indslice.append(simple_eval(bound, names={"i": index}))
                 else:
-                    indslice.append(simple_eval(s, names={"i": index}))
+                    indslice.append(bound[0] * index + bound[1])
         return slicing_tuples
 
+    def evaluate_array(self, indices):
+        """Vectorized evaluation for an array of indices of series
+
+        Parameters
+        ----------
+
+        indices : sequence of int
+
+        Returns
+        -------
+
+        list of list of arrays
+
+          For each dimension, the list of the bounds (arrays of shape
+          ``(len(indices),)``, or None for an open stop).
+
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        result = []
+        for bounds in self._bounds:
+            arrays = []
+            result.append(arrays)
+            for bound in bounds:
+                if bound is None:
+                    arrays.append(None)
+                elif isinstance(bound, str):
+                    arrays.append(
+                        np.array(
+                            [
+                                simple_eval(bound, names={"i": index})
+                                for index in indices.tolist()
+                            ]
+                        )
+                    )
+                else:
+                    arrays.append(bound[0] * indices + bound[1])
+        return result
+
 
 class OutOfRangeError(IndexError):
     """Specific IndexError"""
@@ -783,6 +2660,87 @@ class SlicingTuplesFromIndexSerieAll1By1:
         return [(i0, i0 + 1), (i1, i1 + 1)]
 
 
+class ReadPlan:
+    """Plan to read only once the arrays used by series of arrays.
+
+    Parameters
+    ----------
+
+    index_series : sequence of int
+
+      Indices of the series.
+
+    names_series : sequence of sequences of str
+
+      Names of the arrays of each serie.
+
+    Attributes
+    ----------
+
+    names : tuple of str
+        Names of the arrays without duplicates (in order of first use).
+
+    indices_series : list of tuples of int
+        For each serie, the indices (in ``names``) of its arrays.
+
+    first_use, last_use : numpy.ndarray
+        For each array, position (in ``index_series``) of the first and last
+        series using it.
+
+    ref_counts : numpy.ndarray
+        For each array, number of series using it.
+
+    """
+
+    def __init__(self, index_series, names_series):
+        self.index_series = list(index_series)
+        if len(self.index_series) != len(names_series):
+            raise ValueError("len(index_series) != len(names_series)")
+        indices_names = {}
+        self.indices_series = [
+            tuple(
+                indices_names.setdefault(name, len(indices_names))
+                for name in names
+            )
+            for names in names_series
+        ]
+        self.names = tuple(indices_names)
+
+        nb_arrays = len(self.names)
+        self.first_use = np.full(nb_arrays, -1, dtype=np.int64)
+        self.last_use = np.empty(nb_arrays, dtype=np.int64)
+        self.ref_counts = np.zeros(nb_arrays, dtype=np.int64)
+        for position, indices in enumerate(self.indices_series):
+            indices = np.unique(indices).astype(np.int64)
+            new = indices[self.first_use[indices] == -1]
+            self.first_use[new] = position
+            self.last_use[indices] = position
+            self.ref_counts[indices] += 1
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(nb_series={len(self.index_series)}, "
+            f"nb_arrays={len(self)}, nb_uses={self.get_nb_uses()})"
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def get_nb_uses(self):
+        """Number of arrays used by all series (with duplicates)."""
+        return int(self.ref_counts.sum())
+
+    def get_max_nb_arrays_alive(self):
+        """Maximum number of arrays kept at the same time when reading once."""
+        if not len(self):
+            return 0
+        nb_series = len(self.index_series)
+        changes = np.bincount(
+            self.first_use, minlength=nb_series + 1
+        ) - np.bincount(self.last_use + 1, minlength=nb_series + 1)
+        return int(np.cumsum(changes).max())
+
+
 class SeriesOfArrays:
     """Series of arrays.
 
@@ -794,11 +2752,21 @@ class SeriesOfArrays:
 
     serie: SerieOfArrays or str
 
+      For example a :class:`SerieOfArraysFromFiles` or a
+      :class:`SerieOfArraysFromHDF5`. A str is used to create a
+      :class:`SerieOfArraysFromFiles`.
+
     slicing_tuples_from_indserie: str or function
 
       The function has to take an integer and to return an iterable of
       "slicing tuples" used to compute a file name.
 
+    cache: None, int or ArrayCache
+
+      Cache used to get the arrays (see
+      :func:`SerieOfArraysFromFiles.set_cache`). Useful when the series
+      overlap (for example with "pairs").
+
     """
 
     def __init__(
@@ -808,6 +2776,7 @@ class SeriesOfArrays:
         ind_start="first",
         ind_stop=None,
         ind_step=1,
+        cache=None,
     ):
         serie_input = serie
         slicing_tuples_from_indserie_input = slicing_tuples_from_indserie
@@ -815,10 +2784,15 @@ class SeriesOfArrays:
         if isinstance(serie, (str, Path)):
             serie = str(serie)
             self.serie = serie = SerieOfArraysFromFiles(serie)
-        elif isinstance(serie, SerieOfArraysFromFiles):
-            self.serie = serie = deepcopy(serie)
+        elif isinstance(serie, SerieOfArrays):
+            # the index of the files is shared (no deepcopy)
+            self.serie = serie = serie._copy_shallow()
+            serie._is_view = False
         else:
-            raise ValueError("serie should be a str or a SerieOfArraysFromFiles.")
+            raise ValueError("serie should be a str or a SerieOfArrays.")
+
+        if cache is not None:
+            serie.set_cache(cache)
 
         if slicing_tuples_from_indserie == "pairs":
             if serie.nb_indices == 1:
@@ -872,17 +2846,11 @@ class SeriesOfArrays:
         self.slicing_tuples_from_indserie = slicing_tuples_from_indserie
 
         if ind_start == "first":
-            ind_start = 0
-            while not self.check_all_arrays_serie_exist(ind_start):
-                ind_start += 1
-                if ind_start > MAX_SEARCH_INDEX_START:
-                    raise RuntimeError(
-                        "Maximum iteration reached for search of ind_start."
-                    )
+            ind_start = self._search_ind_start()
 
         if ind_stop is None:
             iserie = ind_start
-            while self.check_all_arrays_serie_exist(iserie):
+            while self._check_serie_exists(iserie):
                 iserie += 1
             iserie -= 1
         else:
@@ -890,7 +2858,7 @@ class SeriesOfArrays:
                 raise ValueError("len(range(ind_start, ind_stop, ind_step)) == 0")
 
             for iserie in range(ind_start, ind_stop, ind_step):
-                if not self.check_all_arrays_serie_exist(iserie):
+                if not self._check_serie_exists(iserie):
                     break
 
         ind_stop = iserie + 1
@@ -927,15 +2895,73 @@ class SeriesOfArrays:
     def __repr__(self):
         return f"{type(self).__name__}({self.serie})"
 
-    def check_all_arrays_serie_exist(self, index_serie):
+    def _get_slicing_tuples_serie(self, index_serie):
+        """Compute the complete slicing tuples of a serie (None if out of range)"""
         try:
             slicing_tuples = self.slicing_tuples_from_indserie(index_serie)
         except OutOfRangeError:
+            return None
+        return self.serie._normalize_slicing_tuples(*slicing_tuples)
+
+    def _check_serie_exists(self, index_serie):
+        slicing_tuples = self._get_slicing_tuples_serie(index_serie)
+        if slicing_tuples is None:
+            return False
+        return self.serie._check_all_arrays_exist(slicing_tuples)
+
+    def _is_serie_below_existing_files(self, index_serie):
+        slicing_tuples = self._get_slicing_tuples_serie(index_serie)
+        if slicing_tuples is None:
             return False
-        self.serie.set_slicing_tuples(*slicing_tuples)
-        return self.serie.check_all_arrays_exist()
+        return self.serie._is_below_existing_files(slicing_tuples)
+
+    def _search_ind_start(self):
+        """Search the index of the first complete serie.
+
+        The series whose indices are smaller than the indices of the existing
+        files are skipped with a bisection (assuming that the slicing tuples
+        increase with the index of the serie).
+
+        """
+        ind_start = 0
+        if self._is_serie_below_existing_files(ind_start):
+            ind_not_below = 1
+            while self._is_serie_below_existing_files(ind_not_below):
+                ind_not_below *= 2
+                if ind_not_below > 2**62:
+                    # the slicing tuples do not increase with the index
+                    raise RuntimeError(
+                        "Maximum iteration reached for search of ind_start."
+                    )
+            ind_below = ind_not_below // 2
+            while ind_not_below - ind_below > 1:
+                ind_middle = (ind_below + ind_not_below) // 2
+                if self._is_serie_below_existing_files(ind_middle):
+                    ind_below = ind_middle
+                else:
+                    ind_not_below = ind_middle
+            ind_start = ind_not_below
+
+        # linear search limited to MAX_SEARCH_INDEX_START steps
+        ind_start_max = ind_start + MAX_SEARCH_INDEX_START
+        while not self._check_serie_exists(ind_start):
+            ind_start += 1
+            if ind_start > ind_start_max:
+                raise RuntimeError(
+                    "Maximum iteration reached for search of ind_start."
+                )
+        return ind_start
+
+    def check_all_arrays_serie_exist(self, index_serie):
+        """Check that all arrays of a serie exist (the serie is not modified)."""
+        return self._check_serie_exists(index_serie)
 
     def __iter__(self):
+        """Iterator on the series (always the same object ``self.serie``).
+
+        See :func:`iter_views` to get immutable views of the series.
+
+        """
         if not hasattr(self, "index_series"):
             self.index_series = range(
                 self.ind_start, self.ind_stop, self.ind_step
@@ -947,6 +2973,29 @@ class SeriesOfArrays:
             )
             yield self.serie
 
+    def iter_views(self):
+        """Iterator on immutable views of the series.
+
+        Contrary to :func:`__iter__` (which always yields the same object
+        ``self.serie`` with modified slicing tuples), a new view (see
+        :func:`SerieOfArrays.get_view`) is yielded for each serie. The views
+        are cheap (they share the index of the files) and can be kept or
+        given to other threads.
+
+        """
+        for iserie in self._get_index_series():
+            yield self.get_view_from_index(iserie)
+
+    def get_view_from_index(self, index):
+        """Get an immutable view of a serie from its index."""
+        return self.serie.get_view(*self.slicing_tuples_from_indserie(index))
+
+    def _get_index_series(self):
+        index_series = getattr(self, "index_series", None)
+        if index_series is None:
+            index_series = range(self.ind_start, self.ind_stop, self.ind_step)
+        return index_series
+
     def items(self):
         if not hasattr(self, "index_series"):
             self.index_series = range(
@@ -960,7 +3009,250 @@ class SeriesOfArrays:
             yield iserie, self.serie
 
     def __len__(self):
-        return len([s for s in self])
+        index_series = getattr(self, "index_series", None)
+        if index_series is None:
+            return len(range(self.ind_start, self.ind_stop, self.ind_step))
+        try:
+            return len(index_series)
+        except TypeError:
+            return sum(1 for _ in index_series)
+
+    def iter_arrays(self, prefetch=0, nb_workers=1):
+        """Iterator on the tuples of arrays of the series.
+
+        Parameters
+        ----------
+
+        prefetch : int
+
+          Number of arrays read in advance by background threads while the
+          current serie is processed (0 means no prefetching). The arrays of
+          the next series are also prefetched.
+
+        nb_workers : int
+
+          Number of threads used for prefetching.
+
+        """
+        if not prefetch:
+            for serie in self:
+                yield serie.get_arrays()
+            return
+
+        nb_arrays_series = deque()
+
+        def iter_names():
+            for serie in self:
+                names = serie.get_name_arrays()
+                nb_arrays_series.append(len(names))
+                yield from names
+
+        names, get_array = self.serie._get_names_loader_one_pass(iter_names())
+        arrays = []
+        with ThreadPoolExecutor(nb_workers) as executor:
+            for array in _imap_ordered(executor, get_array, names, prefetch):
+                arrays.append(array)
+                if len(arrays) == nb_arrays_series[0]:
+                    nb_arrays_series.popleft()
+                    yield tuple(arrays)
+                    arrays = []
+
+    async def aiter_arrays(self, concurrency=4, executor=None):
+        """Asynchronous iterator on the tuples of arrays of the series.
+
+        The arrays are read in an executor so that the event loop is not
+        blocked. The arrays of the next series are read in advance. See
+        :func:`SerieOfArrays.aiter_arrays` for the parameters.
+
+        """
+        nb_arrays_series = deque()
+
+        def iter_names():
+            for view in self.iter_views():
+                names = view.get_name_arrays()
+                nb_arrays_series.append(len(names))
+                yield from names
+
+        names, get_array = self.serie._get_names_loader_one_pass(iter_names())
+        arrays = []
+        async for array in _aimap_ordered(
+            get_array, names, concurrency, executor
+        ):
+            arrays.append(array)
+            if len(arrays) == nb_arrays_series[0]:
+                nb_arrays_series.popleft()
+                yield tuple(arrays)
+                arrays = []
+
+    def map(self, func, executor="process", nb_workers=None, chunksize=1):
+        """Apply a function on the arrays of each serie in parallel.
+
+        The arrays are loaded in the workers and the results are yielded in
+        the order of the series. Only the names of the arrays are sent to the
+        workers and the number of tasks submitted in advance is limited so
+        that the memory usage does not grow with the number of series.
+
+        Parameters
+        ----------
+
+        func : callable
+
+          Called as ``func(arrays)`` with the tuple of arrays of a serie. With
+          the process backend, it has to be picklable (for example defined at
+          the top level of a module).
+
+        executor : {"process", "thread"}
+
+          Kind of workers. With threads, the cache of the serie (see
+          :func:`SerieOfArraysFromFiles.set_cache`) is used.
+
+        nb_workers : int, optional
+
+          Number of workers (default ``os.cpu_count()``).
+
+        chunksize : int
+
+          Number of series sent to a worker in one task.
+
+        """
+        if nb_workers is None:
+            nb_workers = os.cpu_count() or 1
+
+        if executor == "process":
+            cls_executor = ProcessPoolExecutor
+            get_array_from_name = self.serie._get_loader_for_processes()
+        elif executor == "thread":
+            cls_executor = ThreadPoolExecutor
+            get_array_from_name = self.serie.get_array_from_name
+        else:
+            raise ValueError(
+                f'executor should be "process" or "thread" (not {executor!r})'
+            )
+
+        names_series = (serie.get_name_arrays() for serie in self)
+        with cls_executor(nb_workers) as pool:
+            for results in _imap_ordered(
+                pool,
+                partial(_apply_on_series, func, get_array_from_name),
+                _iter_chunks(names_series, chunksize),
+                2 * nb_workers,
+            ):
+                yield from results
+
+    def partition_mpi(self, mode="block", balance_by_size=False):
+        """Restrict the series to the ones processed by this MPI process.
+
+        The series (given by :func:`set_index_series` or by ``ind_start``,
+        ``ind_stop`` and ``ind_step``) are split in ``fluiddyn.util.mpi.nb_proc``
+        disjoint parts and the part of the process ``fluiddyn.util.mpi.rank``
+        is set with :func:`set_index_series`. Without MPI, all series are
+        kept.
+
+        Parameters
+        ----------
+
+        mode : {"block", "cyclic"}
+
+          With "block", each process gets contiguous series. With "cyclic",
+          the series are distributed in a round-robin fashion.
+
+        balance_by_size : bool
+
+          Only for mode="block". The parts are computed so that the total
+          sizes of the files of the series are approximately equal.
+
+        Returns
+        -------
+
+        index_series : list of int
+
+        """
+        index_series = list(self._get_index_series())
+
+        weights = None
+        if balance_by_size:
+            sizes = {}
+            weights = []
+            for index in index_series:
+                serie = self.get_serie_from_index(index)
+                weight = 0
+                for path in serie.get_path_files():
+                    if path not in sizes:
+                        sizes[path] = os.path.getsize(path)
+                    weight += sizes[path]
+                weights.append(weight)
+
+        index_series = _partition_index_series(
+            index_series, mpi.nb_proc, mode, weights
+        )[mpi.rank]
+        self.set_index_series(index_series)
+        return index_series
+
+    def gather_results_mpi(self, results):
+        """Gather to the process 0 results computed for each serie.
+
+        Parameters
+        ----------
+
+        results : dict
+
+          Results of this process for each serie ``{index_serie: result}``,
+          for example computed after :func:`partition_mpi` with
+          ``{index: func(serie) for index, serie in series.items()}``.
+
+        Returns
+        -------
+
+        results : list or None
+
+          For the process 0, the results of all processes sorted by index
+          serie. None for the other processes.
+
+        """
+        if mpi.nb_proc > 1:
+            results_all = mpi.comm.gather(results, root=0)
+            if mpi.rank != 0:
+                return None
+        else:
+            results_all = [results]
+
+        results = {}
+        for results_rank in results_all:
+            results.update(results_rank)
+        return [results[index] for index in sorted(results)]
+
+    def iter_follow(self, timeout=10.0, poll_period=0.5, stable_time=1.0):
+        """Iterator on the series for live acquisitions (follow mode).
+
+        The iteration starts at ``ind_start`` and continues (with the step
+        ``ind_step``) with the series formed by new files written in the
+        directory. A serie is yielded as soon as all its files are complete
+        and ``ind_stop`` is updated accordingly.
+
+        See :func:`SerieOfArraysFromFiles.iter_name_arrays_follow` for the
+        parameters.
+
+        """
+        serie = self.serie
+        with _FilesWatcher(serie, poll_period, stable_time) as watcher:
+            for index_serie in itertools.count(self.ind_start, self.ind_step):
+                slicing_tuples = self._get_slicing_tuples_serie(index_serie)
+                if slicing_tuples is None:
+                    return
+                names_files = set(
+                    serie._compute_name_file_from_indices(*indices)
+                    for indices in itertools.product(
+                        *[range(*s) for s in slicing_tuples]
+                    )
+                )
+                if not watcher.wait_for_files(names_files, timeout):
+                    return
+                self.ind_stop = max(self.ind_stop, index_serie + 1)
+                self.nb_series = len(
+                    range(self.ind_start, self.ind_stop, self.ind_step)
+                )
+                serie.set_slicing_tuples(*slicing_tuples)
+                yield serie
 
     def set_index_series(self, index_series):
         """Set the indices corresponding to the series.
@@ -988,21 +3280,82 @@ class SeriesOfArrays:
         return self.serie
 
     def get_name_all_files(self):
-        """Get all file names."""
-        names_all = []
+        """Get all file names (without duplicates, in order of first use)."""
+        names_all = {}
         for serie in self:
-            names = serie.get_name_files()
-            for name in names:
-                if name not in names_all:
-                    names_all.append(name)
-        return names_all
+            names_all.update(dict.fromkeys(serie.get_name_files()))
+        return list(names_all)
 
     def get_name_all_arrays(self):
-        """Get all array names."""
-        names_all = []
+        """Get all array names (without duplicates, in order of first use)."""
+        names_all = {}
         for serie in self:
-            names = serie.get_name_arrays()
-            for name in names:
-                if name not in names_all:
-                    names_all.append(name)
-        return names_all
+            names_all.update(dict.fromkeys(serie.get_name_arrays()))
+        return list(names_all)
+
+    def get_read_plan(self):
+        """Compute the plan to read each array of the series only once.
+
+        Returns
+        -------
+
+        plan : ReadPlan
+
+        """
+        return ReadPlan(
+            list(self._get_index_series()),
+            [view.get_name_arrays() for view in self.iter_views()],
+        )
+
+    def iter_arrays_read_once(self, plan=None, prefetch=0, nb_workers=1):
+        """Iterator on the tuples of arrays of the series reading each array once.
+
+        The arrays used by several series (for example with overlapping
+        windows) are read only once and are kept only until their last use,
+        so that the number of arrays in memory is bounded by
+        :func:`ReadPlan.get_max_nb_arrays_alive`.
+
+        Parameters
+        ----------
+
+        plan : ReadPlan, optional
+
+          Plan computed by :func:`get_read_plan` (computed if not given).
+
+        prefetch : int
+
+          Number of arrays read in advance by background threads (0 means no
+          prefetching).
+
+        nb_workers : int
+
+          Number of threads used for prefetching.
+
+        """
+        if plan is None:
+            plan = self.get_read_plan()
+
+        names, get_array = self.serie._get_names_loader_one_pass(plan.names)
+        if prefetch:
+            executor = ThreadPoolExecutor(nb_workers)
+            arrays_in_order = _imap_ordered(executor, get_array, names, prefetch)
+        else:
+            executor = None
+            arrays_in_order = map(get_array, names)
+
+        arrays_alive = {}
+        try:
+            for position, indices in enumerate(plan.indices_series):
+                for index in indices:
+                    if index not in arrays_alive:
+                        # arrays are ordered by first use
+                        arrays_alive[index] = next(arrays_in_order)
+                arrays = tuple(arrays_alive[index] for index in indices)
+                for index in indices:
+                    if plan.last_use[index] == position:
+                        arrays_alive.pop(index, None)
+                yield arrays
+        finally:
+            if executor is not None:
+                arrays_in_order.close()
+                executor.shutdown(wait=False, cancel_futures=True)
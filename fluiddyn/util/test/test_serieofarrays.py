@@ -1,8 +1,24 @@
+import asyncio
+import os
+import threading
+import time
+
+import h5py
 import numpy as np
 import pytest
 from PIL import Image
 
-from fluiddyn.util.serieofarrays import SerieOfArraysFromFiles, SeriesOfArrays
+from fluiddyn.util import serieofarrays
+from fluiddyn.util.serieofarrays import (
+    ArrayCache,
+    ReadPlan,
+    SerieOfArraysFromFiles,
+    SerieOfArraysFromHDF5,
+    SeriesOfArrays,
+    SlicingTuplesFromIndexSerie,
+    _IndicesExistingFiles,
+    _partition_index_series,
+)
 
 shape_image = (8, 8)
 
@@ -267,3 +283,749 @@ def test_convert_letters_number():
 
     for letters in ("bc", "oh", "cba"):
         assert _letters_from_number(_number_from_letters(letters)) == letters
+
+
+def test_refresh(tmp_path):
+    for index in range(3):
+        (tmp_path / f"im{index}.png").touch()
+    (tmp_path / ".im9.png").touch()
+    serie = SerieOfArraysFromFiles(tmp_path)
+    assert serie.get_slicing_tuples_all_files() == [(0, 3, 1)]
+    assert serie.check_all_files_exist()
+
+    serie.set_slicing_tuples((0, 4))
+    assert not serie.check_all_files_exist()
+
+    (tmp_path / "im3.png").touch()
+    assert not serie.check_all_files_exist()
+    serie.refresh()
+    assert serie.check_all_files_exist()
+    assert serie.get_slicing_tuples_all_files() == [(0, 4, 1)]
+
+    (tmp_path / "im1.png").unlink()
+    serie.refresh()
+    assert not serie.check_all_files_exist()
+
+
+@pytest.mark.parametrize("index_file", [False, True])
+def test_mixed_width_names(tmp_path, index_file):
+    for index in range(5, 12):
+        np.save(tmp_path / f"im{index}.npy", np.full(shape_image, index))
+    # the names of the serie are given by the first name: im10.npy
+    serie = SerieOfArraysFromFiles(tmp_path, index_file=index_file)
+    assert serie.get_slicing_tuples_all_files() == [(10, 12, 1)]
+    assert serie.get_name_files() == ("im10.npy", "im11.npy")
+    serie.set_slicing_tuples((5, 12))
+    assert not serie.check_all_files_exist()
+
+    series = SeriesOfArrays(tmp_path, "pairs")
+    assert len(series) == 1
+    assert [arrays[0][0, 0] for arrays in series.iter_arrays()] == [10]
+
+    serie = SerieOfArraysFromFiles(tmp_path)
+    np.save(tmp_path / "im12.npy", np.ones(shape_image))
+    np.save(tmp_path / "im4.npy", np.ones(shape_image))
+    serie._add_files_to_index(["im12.npy", "im4.npy"])
+    assert serie.get_slicing_tuples_all_files() == [(10, 13, 1)]
+
+
+@pytest.mark.parametrize("index_file", [False, True])
+@pytest.mark.parametrize("path", ["im5.npy", "im?.npy"])
+def test_current_directory(tmp_path, monkeypatch, path, index_file):
+    for index in range(5, 12):
+        np.save(tmp_path / f"im{index}.npy", np.full(shape_image, index))
+    monkeypatch.chdir(tmp_path)
+    serie = SerieOfArraysFromFiles(path, index_file=index_file)
+    assert serie.path_dir == ""
+    assert serie.get_slicing_tuples_all_files() == [(5, 12, 1)]
+    assert serie.get_array_from_indices(11)[0, 0] == 11
+    serie.refresh()
+    assert serie.check_all_files_exist()
+
+
+def test_iter_arrays_prefetch(tmp_path):
+    for index in range(6):
+        im = Image.fromarray(np.full(shape_image, index, dtype=np.uint8))
+        im.save(tmp_path / f"im{index}.png")
+        im.close()
+
+    serie = SerieOfArraysFromFiles(tmp_path)
+    arrays = list(serie.iter_arrays(prefetch=3, nb_workers=2))
+    assert [arr[0, 0] for arr in arrays] == list(range(6))
+
+    series = SeriesOfArrays(tmp_path, "pairs")
+    pairs = list(series.iter_arrays(prefetch=3, nb_workers=2))
+    assert len(pairs) == len(series) == 5
+    for (arr0, arr1), pair in zip(pairs, series.iter_arrays()):
+        assert np.array_equal(arr0, pair[0])
+        assert np.array_equal(arr1, pair[1])
+    assert [arr1[0, 0] for arr0, arr1 in pairs] == list(range(1, 6))
+
+    # a read error is raised at the position of the array
+    (tmp_path / "im3.png").write_bytes(b"not a png")
+    iterator = serie.iter_arrays(prefetch=4, nb_workers=2)
+    for index in range(3):
+        assert next(iterator)[0, 0] == index
+    with pytest.raises(Exception):
+        next(iterator)
+
+
+def test_aiter_arrays(tmp_path):
+    for index in range(6):
+        im = Image.fromarray(np.full(shape_image, index, dtype=np.uint8))
+        im.save(tmp_path / f"im{index}.png")
+        im.close()
+
+    serie = SerieOfArraysFromFiles(tmp_path)
+    series = SeriesOfArrays(tmp_path, "pairs")
+    nb_threads = threading.active_count()
+
+    async def consume():
+        arrays = [array async for array in serie.aiter_arrays(concurrency=3)]
+        pairs = [pair async for pair in series.aiter_arrays(concurrency=2)]
+        # stop the iteration before the end
+        async for array in serie.aiter_arrays():
+            break
+        return arrays, pairs
+
+    arrays, pairs = asyncio.run(consume())
+    assert [arr[0, 0] for arr in arrays] == list(range(6))
+    assert [(arr0[0, 0], arr1[0, 0]) for arr0, arr1 in pairs] == [
+        (index, index + 1) for index in range(5)
+    ]
+    # the threads of the executors are stopped
+    for _ in range(100):
+        if threading.active_count() == nb_threads:
+            break
+        time.sleep(0.02)
+    assert threading.active_count() == nb_threads
+
+
+def test_cache(path_dir_images_1d):
+    nbytes_array = np.ones(shape_image, dtype=np.uint16).nbytes
+    series = SeriesOfArrays(path_dir_images_1d, "pairs", cache=2 * nbytes_array)
+    cache = series.serie.get_cache()
+    assert isinstance(cache, ArrayCache)
+    for arrays in series.iter_arrays():
+        assert not arrays[0].flags.writeable
+    assert cache.nb_misses == shape1d[0]
+    assert cache.nb_hits == shape1d[0] - 2
+    assert cache.nbytes == 2 * nbytes_array
+    repr(cache)
+
+    # copies of the serie share the cache
+    series = SeriesOfArrays(series.serie, "i:i+3")
+    assert series.serie.get_cache() is cache
+
+    cache.clear()
+    assert len(cache) == cache.nb_hits == cache.nbytes == 0
+
+    # arrays larger than the budget are not cached
+    serie = SerieOfArraysFromFiles(path_dir_images_1d)
+    serie.set_cache(nbytes_array // 2)
+    serie.get_arrays()
+    assert len(serie.get_cache()) == 0
+    serie.set_cache(None)
+    assert serie.get_cache() is None
+
+
+def test_series_search_ind_start_stop(tmp_path):
+    for index in range(1000, 1010):
+        if index != 1005:
+            (tmp_path / f"im{index}.png").touch()
+
+    series = SeriesOfArrays(tmp_path, "i:i+2")
+    assert series.ind_start == 1000
+    assert series.ind_stop == 1004
+    assert len(series) == 4
+
+    slicing_tuples = series.serie.get_slicing_tuples()
+    assert not series.check_all_arrays_serie_exist(1004)
+    assert series.check_all_arrays_serie_exist(1006)
+    assert series.serie.get_slicing_tuples() == slicing_tuples
+
+    series = SeriesOfArrays(tmp_path, "i:i+2", ind_start=1006)
+    assert series.ind_stop == 1009
+    assert len(series) == 3
+
+    series.set_index_series([1006, 1008])
+    assert len(series) == 2
+
+
+@pytest.mark.parametrize("first_index", [80_000, 250_000])
+def test_series_search_ind_start_large(tmp_path, first_index):
+    for index in range(first_index, first_index + 5):
+        (tmp_path / f"im{index}.png").touch()
+    series = SeriesOfArrays(tmp_path, "i:i+1")
+    assert series.ind_start == first_index
+    assert len(series) == 5
+
+
+def _sum_first_pixels(arrays):
+    return sum(int(arr[0, 0]) for arr in arrays)
+
+
+def test_series_map(tmp_path):
+    for index in range(7):
+        im = Image.fromarray(np.full(shape_image, index, dtype=np.uint8))
+        im.save(tmp_path / f"im{index}.png")
+        im.close()
+
+    series = SeriesOfArrays(tmp_path, "pairs")
+    expected = [2 * index + 1 for index in range(6)]
+
+    for executor in ("thread", "process"):
+        results = series.map(
+            _sum_first_pixels, executor=executor, nb_workers=2, chunksize=2
+        )
+        assert list(results) == expected
+
+    with pytest.raises(ValueError):
+        next(series.map(_sum_first_pixels, executor="bad"))
+
+
+def test_partition_index_series():
+    index_series = range(7)
+    parts = _partition_index_series(index_series, 3)
+    assert parts == [[0, 1, 2], [3, 4], [5, 6]]
+    parts = _partition_index_series(index_series, 3, "cyclic")
+    assert parts == [[0, 3, 6], [1, 4], [2, 5]]
+    parts = _partition_index_series(
+        index_series, 2, weights=[10, 1, 1, 1, 1, 1, 1]
+    )
+    assert parts == [[0], [1, 2, 3, 4, 5, 6]]
+
+    with pytest.raises(ValueError):
+        _partition_index_series(index_series, 2, "cyclic", weights=[1] * 7)
+    with pytest.raises(ValueError):
+        _partition_index_series(index_series, 2, "bad")
+
+
+def test_series_partition_mpi(path_dir_images_1d):
+    series = SeriesOfArrays(path_dir_images_1d, "pairs")
+    index_series = series.partition_mpi(balance_by_size=True)
+    assert index_series == list(range(len(series)))
+    results = {index: len(serie) for index, serie in series.items()}
+    assert series.gather_results_mpi(results) == [2] * len(series)
+
+
+def test_get_stacked_array(tmp_path):
+    path_dir = tmp_path / "images"
+    path_dir.mkdir()
+    for index in range(4):
+        im = Image.fromarray(np.full(shape_image, index, dtype=np.uint8))
+        im.save(path_dir / f"im{index}.png")
+        im.close()
+    serie = SerieOfArraysFromFiles(path_dir, "1:4")
+
+    stacked = serie.get_stacked_array()
+    assert stacked.shape == (3,) + shape_image
+    assert stacked.dtype == np.uint8
+    assert np.array_equal(stacked[:, 0, 0], [1, 2, 3])
+
+    stacked = serie.get_stacked_array(dtype=np.float32, nb_workers=2)
+    assert stacked.dtype == np.float32
+    assert np.array_equal(stacked[:, 0, 0], [1, 2, 3])
+
+    out = np.zeros((3,) + shape_image, dtype=np.int32)
+    assert serie.get_stacked_array(out=out) is out
+    assert np.array_equal(out[:, 0, 0], [1, 2, 3])
+    with pytest.raises(ValueError):
+        serie.get_stacked_array(out=out[:2])
+
+    stacked = serie.get_stacked_array(memmap_path=tmp_path / "stack.bin")
+    assert isinstance(stacked, np.memmap)
+    assert np.array_equal(stacked[:, 0, 0], [1, 2, 3])
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_follow(tmp_path, monkeypatch, use_inotify):
+    if not use_inotify:
+        monkeypatch.setattr(serieofarrays, "_inotify_init", lambda path: None)
+
+    for index in range(2):
+        create_image(tmp_path / f"im{index}.png")
+
+    def write_images(indices):
+        for index in indices:
+            create_image(tmp_path / f"im{index}.png")
+
+    kwargs = dict(timeout=0.5, poll_period=0.05, stable_time=0.1)
+
+    serie = SerieOfArraysFromFiles(tmp_path)
+    threading.Timer(0.1, write_images, [(2, 3)]).start()
+    names = list(serie.iter_name_arrays_follow(**kwargs))
+    assert names == [f"im{index}.png" for index in range(4)]
+    assert serie.get_slicing_tuples_all_files() == [(0, 4, 1)]
+
+    series = SeriesOfArrays(tmp_path, "pairs")
+    assert len(series) == 3
+    threading.Timer(0.1, write_images, [(4, 5)]).start()
+    assert len(list(series.iter_follow(**kwargs))) == 5
+    assert len(series) == 5
+
+    arrays = list(serie.iter_arrays_follow(**kwargs))
+    assert len(arrays) == 6
+
+
+def test_follow_incomplete_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(serieofarrays, "_inotify_init", lambda path: None)
+    for index in range(2):
+        create_image(tmp_path / f"im{index}.png")
+    serie = SerieOfArraysFromFiles(tmp_path)
+
+    path = tmp_path / "im2.png"
+    path.write_bytes(b"partially written")
+    with serieofarrays._FilesWatcher(serie, stable_time=100) as watcher:
+        assert not watcher.wait_for_files(["im2.png"], timeout=0)
+        # a partially written file is not seen as available
+        assert (2,) not in serie._indices_files
+        serie.set_slicing_tuples((0, 3))
+        assert not serie.check_all_files_exist()
+
+        create_image(path)
+        mtime = time.time() - 200
+        os.utime(path, (mtime, mtime))
+        assert watcher.wait_for_files(["im2.png"], timeout=0)
+        assert serie.check_all_files_exist()
+
+
+def test_index_file(tmp_path, monkeypatch):
+    for index in range(4):
+        (tmp_path / f"im{index}.png").touch()
+
+    def set_old_mtime_dir():
+        mtime = time.time() - 100
+        os.utime(tmp_path, (mtime, mtime))
+
+    set_old_mtime_dir()
+    serie = SerieOfArraysFromFiles(tmp_path / "im0.png", index_file=True)
+    path_index_file = serie._path_index_file
+    assert os.path.exists(path_index_file)
+    assert serie.get_slicing_tuples_all_files() == [(0, 4, 1)]
+
+    # the directory has been modified by the creation of the index file
+    set_old_mtime_dir()
+    SerieOfArraysFromFiles(tmp_path / "im0.png", index_file=True)
+
+    def _list_names_in_dir(path_dir):
+        raise RuntimeError("The directory should not be scanned")
+
+    with monkeypatch.context() as context:
+        context.setattr(serieofarrays, "_list_names_in_dir", _list_names_in_dir)
+        serie = SerieOfArraysFromFiles(tmp_path / "im0.png", index_file=True)
+    assert serie.get_slicing_tuples_all_files() == [(0, 4, 1)]
+    assert serie.check_all_files_exist()
+
+    (tmp_path / "im4.png").touch()
+    (tmp_path / "im0.png").unlink()
+    serie = SerieOfArraysFromFiles(tmp_path / "im1.png", index_file=True)
+    assert serie.get_slicing_tuples_all_files() == [(1, 5, 1)]
+
+    path_index_file = tmp_path / "index.npz"
+    path_index_file.write_bytes(b"corrupted")
+    serie = SerieOfArraysFromFiles(tmp_path, index_file=path_index_file)
+    assert serie.get_slicing_tuples_all_files() == [(1, 5, 1)]
+
+
+def test_index_file_formats(tmp_path):
+    for index in range(5, 12):
+        np.save(tmp_path / f"im{index}.npy", np.full(shape_image, index))
+
+    def create_serie(name, index_file):
+        mtime = time.time() - 100
+        os.utime(tmp_path, (mtime, mtime))
+        return SerieOfArraysFromFiles(tmp_path / name, index_file=index_file)
+
+    # same glob (im*.npy) but different widths of the index
+    for index_file in (True, tmp_path / "index.npz"):
+        for _ in range(2):
+            serie5 = create_serie("im5.npy", index_file)
+            assert serie5.get_slicing_tuples_all_files() == [(5, 12, 1)]
+            serie10 = create_serie("im10.npy", index_file)
+            assert serie10.get_slicing_tuples_all_files() == [(10, 12, 1)]
+            assert serie10.get_name_files() == ("im10.npy", "im11.npy")
+            assert serie10.get_arrays()[0][0, 0] == 10
+    assert (
+        create_serie("im5.npy", True)._path_index_file
+        != create_serie("im10.npy", True)._path_index_file
+    )
+
+
+def test_indices_existing_files():
+    indices = _IndicesExistingFiles([(0, 1), (2, 0)])
+    assert indices._grid is not None
+    assert (0, 1) in indices and (2, 0) in indices
+    assert (1, 1) not in indices and (3, 0) not in indices
+    indices.add((4, 1))
+    assert (4, 1) in indices and (0, 1) in indices
+
+    indices = _IndicesExistingFiles([(0,), (10000,)])
+    assert indices._grid is None
+    assert (10000,) in indices and (1,) not in indices
+    indices.add((1,))
+    assert (1,) in indices
+
+    # incremental adds grow the grid geometrically
+    indices = _IndicesExistingFiles([(5, 0), (5, 1)])
+    grids = set()
+    for index in range(6, 20_000):
+        indices.add((index, index % 2))
+        grids.add(id(indices._grid))
+    indices.add((2, 0))
+    assert indices._grid is not None
+    assert len(grids) < 20
+    assert indices._starts == (2, 0) and indices._shape == (19_998, 2)
+    assert (19_999, 1) in indices and (2, 0) in indices
+    assert (3, 0) not in indices and (20_000, 0) not in indices
+
+    indices.add((10**7, 0))
+    assert indices._grid is None
+    assert (10**7, 0) in indices and (19_999, 1) in indices
+    assert indices._shape == (10**7 - 1, 2)
+
+
+@pytest.mark.parametrize(
+    "names", [["im0001_a.png", "im0010_B.png"], ["c_1-12bc.h5", "c_2-3ab.h5"]]
+)
+def test_compute_indices_names_batch(tmp_path, names):
+    for name in names:
+        (tmp_path / name).touch()
+    serie = SerieOfArraysFromFiles(tmp_path)
+    names = sorted(names)
+    indices = serie.compute_indices_from_names(names)
+    assert indices.shape == (2, serie.nb_indices)
+    assert indices.tolist() == [serie.compute_indices_from_name(n) for n in names]
+    names_computed = serie.compute_names_from_indices(indices)
+    assert names_computed == [
+        serie.compute_name_from_indices(*i) for i in indices
+    ]
+    assert serie.compute_indices_from_names(names_computed).tolist() == (
+        indices.tolist()
+    )
+    assert serie.compute_indices_from_names([]).shape == (0, serie.nb_indices)
+
+    with pytest.raises(ValueError):
+        serie.compute_indices_from_name("bad_name.png")
+    with pytest.raises(ValueError):
+        serie.compute_indices_from_names(names + ["bad_name.png"])
+    with pytest.raises(ValueError):
+        serie.compute_names_from_indices(indices[:, :1])
+
+
+def test_compute_names_from_indices_1d(path_dir_images_1d):
+    serie = SerieOfArraysFromFiles(path_dir_images_1d)
+    assert serie.compute_names_from_indices(range(2)) == [
+        "file0.png",
+        "file1.png",
+    ]
+
+
+def test_indices_from_index_3d(tmp_path):
+    for i0 in range(3):
+        for i1 in range(4):
+            for letter in "ab":
+                (tmp_path / f"im{i0}_{i1}{letter}.h5").touch()
+
+    serie = SerieOfArraysFromFiles(tmp_path, "0:3, 1:4:2, :")
+    assert len(serie) == serie.get_nb_arrays() == 12
+    _check_get_indices_from_index(serie)
+    tuple_indices = tuple(serie.iter_indices())
+    assert serie.get_indices_from_index(-1) == tuple_indices[-1]
+    with pytest.raises(IndexError):
+        serie.get_indices_from_index(12)
+
+    index_array = np.arange(-12, 12)
+    indices = serie.get_indices_from_index_array(index_array)
+    assert indices.shape == (24, 3)
+    assert [tuple(i) for i in indices.tolist()] == 2 * list(tuple_indices)
+    with pytest.raises(IndexError):
+        serie.get_indices_from_index_array([12])
+
+    for index, indices in enumerate(tuple_indices):
+        assert serie.get_index_from_indices(*indices) == index
+    assert serie.get_index_array_from_indices(tuple_indices).tolist() == list(
+        range(12)
+    )
+    with pytest.raises(ValueError):
+        serie.get_index_from_indices(0, 2, 0)
+    with pytest.raises(ValueError):
+        serie.get_index_array_from_indices([(0, 2, 0)])
+
+
+def test_slicing_tuples_from_index_serie(path_dir_images_2d):
+    serie = SerieOfArraysFromFiles(path_dir_images_2d)
+    start0, start1 = (s[0] for s in serie.get_slicing_tuples())
+
+    func = SlicingTuplesFromIndexSerie("2*i+1:-(1 - i)*3 + i, :", serie)
+    assert func.is_affine
+    assert func._bounds == [[(2, 1), (4, -3)], [(0, start1), None]]
+    assert func(2) == [[5, 5], [start1, None]]
+
+    func = SlicingTuplesFromIndexSerie("i//2:i//2+1:1, 3 * 2 - 4:", serie)
+    assert not func.is_affine
+    assert func(5) == [[2, 3, 1], [2, None]]
+
+    indices = np.arange(10)
+    result = func.evaluate_array(indices)
+    for index in indices:
+        assert [
+            [None if bound is None else bound[index] for bound in bounds]
+            for bounds in result
+        ] == func(index)
+
+    with pytest.raises(ValueError):
+        SlicingTuplesFromIndexSerie("i:i+1:1:1, :", serie)
+    with pytest.raises(ValueError):
+        SlicingTuplesFromIndexSerie("i:i+, :", serie)
+
+
+@pytest.fixture
+def path_file_hdf5(tmp_path):
+    path = tmp_path / "stack.h5"
+    with h5py.File(path, "w") as file:
+        file.create_dataset(
+            "images",
+            data=np.arange(20 * 4 * 3).reshape((20, 4, 3)),
+            chunks=(3, 4, 3),
+        )
+        file.create_dataset("times", data=np.arange(20.0))
+    return path
+
+
+def test_serie_hdf5(path_file_hdf5):
+    serie = SerieOfArraysFromHDF5(path_file_hdf5, slicing="2:17:3")
+    assert repr(serie).startswith("SerieOfArraysFromHDF5(")
+    assert serie.key == "images"
+    with h5py.File(path_file_hdf5, "r") as file:
+        data = file["images"][...]
+
+    assert len(serie) == 5
+    assert serie.get_name_arrays() == tuple(
+        f"images[{index}]" for index in range(2, 17, 3)
+    )
+    assert serie.compute_indices_from_name("images[8]") == (8,)
+    assert serie.get_nb_files() == 1
+    for array, index in zip(serie.iter_arrays(), range(2, 17, 3)):
+        assert np.array_equal(array, data[index])
+    assert np.array_equal(serie.get_stacked_array(), data[2:17:3])
+    assert np.array_equal(serie.get_array_from_index(1), data[5])
+    assert np.array_equal(serie.get_array_from_name("images[19]"), data[19])
+
+    serie.set_slicing_tuples((10, 4, -2))
+    assert np.array_equal(np.array(serie.get_arrays()), data[10:4:-2])
+    assert np.array_equal(serie.get_stacked_array(), data[10:4:-2])
+
+    serie.set_cache(10_000)
+    serie.get_arrays()
+    serie.get_arrays()
+    assert serie.get_cache().nb_hits == 3
+
+    assert serie.check_all_arrays_exist()
+    serie.set_slicing_tuples((15, 21))
+    assert not serie.check_all_arrays_exist()
+
+
+def test_series_hdf5(path_file_hdf5):
+    serie = SerieOfArraysFromHDF5(path_file_hdf5, "images")
+    series = SeriesOfArrays(serie, "pairs")
+    assert len(series) == 19
+    # the serie of the series shares the open file
+    assert series.serie._file is serie._file
+    for index, arrays in zip(range(19), series.iter_arrays()):
+        assert np.array_equal(arrays[1], serie.get_array_from_indices(index + 1))
+
+    expected = [_sum_first_pixels(arrays) for arrays in series.iter_arrays()]
+    assert list(series.map(_sum_first_pixels, nb_workers=2)) == expected
+
+
+def test_serie_hdf5_netcdf(tmp_path):
+    h5netcdf = pytest.importorskip("h5netcdf")
+    path = tmp_path / "stack.nc"
+    data = np.random.rand(4, 6, 5)
+    with h5netcdf.File(path, "w") as file:
+        file.dimensions = {"y": 4, "time": 6, "x": 5}
+        variable = file.create_variable("u", ("y", "time", "x"), float)
+        variable[...] = data
+
+    serie = SerieOfArraysFromHDF5(path, "u", axis="time")
+    assert serie.axis == 1
+    assert len(serie) == 6
+    assert np.array_equal(serie.get_stacked_array(), np.moveaxis(data, 1, 0))
+    assert np.array_equal(serie.get_array_from_index(2), data[:, 2])
+
+
+def test_views(path_dir_images_1d):
+    serie = SerieOfArraysFromFiles(path_dir_images_1d)
+    view = serie.get_view((1, 3))
+    assert view.is_view() and not serie.is_view()
+    assert view._indices_files is serie._indices_files
+    assert len(view) == 2
+    with pytest.raises(ValueError):
+        view.set_slicing_tuples((0, 2))
+    with pytest.raises(ValueError):
+        view.refresh()
+
+    series = SeriesOfArrays(serie, "i:i+2")
+    assert series.serie._indices_files is serie._indices_files
+    views = list(series.iter_views())
+    assert len(views) == len(series)
+    for index, (view, serie_) in enumerate(zip(views, series)):
+        assert view.get_name_arrays() == serie_.get_name_arrays()
+        assert view.get_slicing_tuples() == (
+            series.get_view_from_index(index).get_slicing_tuples()
+        )
+    # the views are not modified by the iteration
+    assert views[0].get_name_arrays() != views[1].get_name_arrays()
+
+    series_from_view = SeriesOfArrays(views[0], "i:i+1")
+    assert not series_from_view.serie.is_view()
+
+
+def test_copy_add_files(tmp_path):
+    for index in range(4):
+        create_image(tmp_path / f"im{index}.png")
+    serie = SerieOfArraysFromFiles(tmp_path)
+    series = SeriesOfArrays(serie, "i:i+2")
+    view = serie.get_view()
+
+    # new file found by the serie of the SeriesOfArrays (follow mode)
+    create_image(tmp_path / "im4.png")
+    series.serie._add_files_to_index(["im4.png"])
+    assert series.serie.get_slicing_tuples_all_files() == [(0, 5, 1)]
+    assert (4,) in series.serie._indices_files
+    for serie_ in (serie, view):
+        assert serie_.get_slicing_tuples_all_files() == [(0, 4, 1)]
+        assert (4,) not in serie_._indices_files
+
+    create_image(tmp_path / "im5.png")
+    serie._add_files_to_index(["im5.png"])
+    assert serie.get_slicing_tuples_all_files() == [(0, 6, 1)]
+    assert (5,) not in series.serie._indices_files
+    assert view.get_slicing_tuples_all_files() == [(0, 4, 1)]
+
+
+def test_read_plan(tmp_path):
+    for index in range(8):
+        im = Image.fromarray(np.full(shape_image, index, dtype=np.uint8))
+        im.save(tmp_path / f"im{index}.png")
+        im.close()
+
+    series = SeriesOfArrays(tmp_path, "i:i+3")
+    assert series.get_name_all_arrays() == [
+        f"im{index}.png" for index in range(8)
+    ]
+    assert series.get_name_all_files() == series.get_name_all_arrays()
+
+    plan = series.get_read_plan()
+    assert len(plan) == 8
+    assert plan.get_nb_uses() == 3 * len(series) == 18
+    assert plan.names[:2] == ("im0.png", "im1.png")
+    assert plan.indices_series[1] == (1, 2, 3)
+    assert plan.first_use.tolist() == [0, 0, 0, 1, 2, 3, 4, 5]
+    assert plan.last_use.tolist() == [0, 1, 2, 3, 4, 5, 5, 5]
+    assert plan.ref_counts.tolist() == [1, 2, 3, 3, 3, 3, 2, 1]
+    assert plan.get_max_nb_arrays_alive() == 3
+    assert repr(plan).startswith("ReadPlan(")
+
+    loaded = []
+    get_array_from_name = series.serie.get_array_from_name
+
+    def get_array_counting(name):
+        loaded.append(name)
+        return get_array_from_name(name)
+
+    series.serie.get_array_from_name = get_array_counting
+    for prefetch in (0, 2):
+        loaded.clear()
+        results = list(series.iter_arrays_read_once(plan, prefetch=prefetch))
+        assert sorted(loaded) == sorted(plan.names)
+        assert [tuple(array[0, 0] for array in arrays) for arrays in results] == [
+            (index, index + 1, index + 2) for index in range(6)
+        ]
+
+    with pytest.raises(ValueError):
+        ReadPlan([0, 1], [("a",)])
+
+
+def test_io_hints(tmp_path, monkeypatch):
+    for index in range(6):
+        im = Image.fromarray(np.full(shape_image, index, dtype=np.uint8))
+        im.save(tmp_path / f"im{index}.png")
+        im.close()
+
+    events = []
+    monkeypatch.setattr(
+        serieofarrays,
+        "_fadvise",
+        lambda path, advice: events.append((advice, os.path.basename(path))),
+    )
+    serie = SerieOfArraysFromFiles(tmp_path)
+    serie.set_io_hints(nb_files_ahead=2, drop_after_read=True)
+    iterator = serie.iter_arrays()
+    assert next(iterator)[0, 0] == 0
+    assert events == [
+        ("WILLNEED", "im0.png"),
+        ("WILLNEED", "im1.png"),
+        ("WILLNEED", "im2.png"),
+        ("DONTNEED", "im0.png"),
+    ]
+    assert [array[0, 0] for array in iterator] == list(range(1, 6))
+    assert sorted(name for advice, name in events if advice == "WILLNEED") == [
+        f"im{index}.png" for index in range(6)
+    ]
+    assert [name for advice, name in events if advice == "DONTNEED"] == [
+        f"im{index}.png" for index in range(6)
+    ]
+
+    events.clear()
+    series = SeriesOfArrays(serie, "i:i+2")
+    assert series.serie._nb_files_ahead == 2
+    assert len(list(series.iter_arrays_read_once(prefetch=2))) == 5
+    assert len(events) == 12
+
+    with pytest.raises(ValueError):
+        serie.set_io_hints(-1)
+
+
+def test_roi_step(tmp_path, path_file_hdf5):
+    images = np.arange(4 * 10 * 12, dtype=np.uint8).reshape((4, 10, 12))
+    for index, image in enumerate(images):
+        np.save(tmp_path / f"im{index}.npy", image)
+        Image.fromarray(image).save(tmp_path / f"im{index}.png")
+
+    roi = (slice(1, 9), slice(2, None))
+    expected = images[:, 1:9:2, 2::2]
+    for extension in ("npy", "png"):
+        serie = SerieOfArraysFromFiles(tmp_path / f"im0.{extension}")
+        assert np.array_equal(
+            serie.get_array_from_index(1, roi=roi, step=2), expected[1]
+        )
+        assert np.array_equal(serie.get_stacked_array(roi=roi, step=2), expected)
+        assert np.array_equal(
+            np.array(list(serie.iter_arrays(prefetch=2, roi=roi, step=2))),
+            expected,
+        )
+        serie.set_cache(10_000)
+        arrays = serie.get_arrays(roi=roi, step=2)
+        assert np.array_equal(np.array(arrays), expected)
+        assert np.array_equal(np.array(serie.get_arrays()), images)
+        assert serie.get_cache().nb_misses == 8
+
+    serie = SerieOfArraysFromHDF5(path_file_hdf5)
+    with h5py.File(path_file_hdf5, "r") as file:
+        data = file["images"][...]
+    assert np.array_equal(
+        serie.get_stacked_array(roi=slice(1, 3), step=(1, 2)), data[:, 1:3, ::2]
+    )
+    assert np.array_equal(
+        serie.get_array_from_index(3, step=2), data[3, ::2, ::2]
+    )
+    assert np.array_equal(
+        next(serie.iter_arrays(roi=(slice(2, None),))), data[0, 2:]
+    )
+
+    with pytest.raises(ValueError):
+        serie.get_array_from_index(0, roi=slice(None, None, -1))
+    with pytest.raises(ValueError):
+        serie.get_array_from_index(0, roi=(1, slice(None)))